@@ -2,8 +2,7 @@ from .openmeteo_tools import OpenMeteoWeather
 from .cds_tools import CDSTools
 from .copernicus_tools import CopernicusTools
 from .firms_tools import FIRMSTools
-from .gee_tools import GEETools
-from .project_config import ProjectConfig, logger
+from .project_config import ProjectConfig
 from .perceptron import Perceptron
 from .spatial_analysis import SpatialAnalysis
 
@@ -11,9 +10,7 @@ __all__ = ['OpenMeteoWeather',
            'CDSTools', 
            'CopernicusTools', 
            'FIRMSTools', 
-           'GEETools', 
            'ProjectConfig', 
-           'logger', 
            'Perceptron',
            'SpatialAnalysis'
-           ]
\ No newline at end of file
+           ]
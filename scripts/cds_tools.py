@@ -1,13 +1,20 @@
 import os
 import logging
 import datetime
+import functools
+import threading
+import time
 import cdsapi
+import orjson
+import requests
 import xarray as xr
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, List, Union, Tuple
+from typing import Optional, Dict, List, Union, Tuple, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dateutil.relativedelta import relativedelta
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from project_config import ProjectConfig as cfg
 
 # Configurar logging
@@ -16,6 +23,120 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('cds_tools')
 
+# Límite de solicitudes simultáneas por usuario documentado por el CDS.
+MAX_CONCURRENT_REQUESTS = 5
+
+# Semáforo compartido entre instancias para respetar el límite de uso justo.
+_request_slots = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Índice fecha -> archivos NetCDF descargados, guardado junto a los datos.
+TIME_INDEX_FILENAME = '_time_index.json'
+NETCDF_SUFFIXES = ('.nc', '.netcdf')
+
+# Meses y días en el formato que espera el CDS ('01', '02', ...).
+MONTHS_ALL = [f'{month:02d}' for month in range(1, 13)]
+DAYS_ALL = [f'{day:02d}' for day in range(1, 32)]
+
+# Horas solicitadas en todas las consultas (00:00 a 23:00).
+HOURS_ALL = tuple(f'{hour:02d}:00' for hour in range(24))
+
+# Intervalo entre consultas del estado de una solicitud encolada (segundos).
+POLL_INTERVAL = 30
+
+# Unidades de tiempo CF ('hours since ...') y su equivalente en pandas.
+CF_TIME_UNITS = {'days': 'D', 'hours': 'h', 'minutes': 'm', 'seconds': 's'}
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_date(value: str) -> datetime.date:
+    """
+    Convierte una fecha 'YYYY-MM-DD' a date, reutilizando conversiones previas.
+    
+    Args:
+        value: Fecha en formato ISO (YYYY-MM-DD)
+        
+    Returns:
+        Objeto date correspondiente
+        
+    Raises:
+        ValueError: Si la fecha no tiene formato ISO válido
+    """
+    return datetime.date.fromisoformat(value)
+
+
+def enumerate_monthly_windows(start_date: str, end_date: str) -> Iterator[Tuple[str, str]]:
+    """
+    Divide el rango de fechas en ventanas de a lo sumo un mes calendario.
+    
+    Args:
+        start_date: Fecha de inicio (YYYY-MM-DD)
+        end_date: Fecha de fin (YYYY-MM-DD)
+        
+    Yields:
+        Tuplas (sub_start, sub_end) contenidas en un único mes
+    """
+    window_start = _parse_date(start_date)
+    end_dt = _parse_date(end_date)
+    
+    while window_start <= end_dt:
+        # relativedelta(day=31) lleva la fecha al último día del mes
+        window_end = min(window_start + relativedelta(day=31), end_dt)
+        yield window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')
+        window_start = window_end + relativedelta(days=1)
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=30, max=600),
+    retry=retry_if_exception_type(requests.exceptions.RequestException),
+    reraise=True
+)
+def retrieve_with_resume(client: cdsapi.Client, dataset: str, params: Dict, output_path: str) -> str:
+    """
+    Envía una solicitud al CDS y descarga el resultado, reanudando si es posible.
+    
+    El request_id se guarda en un archivo '.request_id.json' junto al destino,
+    de modo que si el proceso se interrumpe la siguiente ejecución consulta la
+    misma solicitud en lugar de volver a encolarla. Los errores de red se
+    reintentan con espera exponencial. El cliente debe crearse con
+    wait_until_complete=False.
+    
+    Args:
+        client: Cliente CDS
+        dataset: Dataset CDS a consultar
+        params: Parámetros de la solicitud
+        output_path: Ruta del archivo de salida
+        
+    Returns:
+        Ruta al archivo descargado
+    """
+    sidecar = Path(output_path).with_suffix('.request_id.json')
+    
+    if sidecar.exists():
+        request_id = orjson.loads(sidecar.read_bytes())['request_id']
+        logger.info(f"Reanudando solicitud CDS {request_id} para {output_path}")
+        result = cdsapi.api.Result(client, {'request_id': request_id})
+    else:
+        result = client.retrieve(dataset, params)
+        sidecar.write_bytes(orjson.dumps({'request_id': result.reply['request_id'], 'dataset': dataset}))
+    
+    # Esperar a que el CDS procese la solicitud
+    result.update()
+    while result.reply['state'] in ('queued', 'running'):
+        time.sleep(POLL_INTERVAL)
+        result.update()
+    
+    if result.reply['state'] != 'completed':
+        sidecar.unlink(missing_ok=True)
+        raise RuntimeError(f"La solicitud CDS {result.reply.get('request_id')} falló: {result.reply.get('error')}")
+    
+    # Descargar a un archivo temporal para no dejar archivos a medias en el destino
+    partial_path = f"{output_path}.part"
+    result.download(partial_path)
+    os.replace(partial_path, output_path)
+    sidecar.unlink(missing_ok=True)
+    return output_path
+
 
 class CDSTools:
     """Clase para obtener datos del Climate Data Store de Copernicus."""
@@ -27,11 +148,12 @@ class CDSTools:
         Args:
             config_path: Ruta al archivo de configuración .cdsapirc
         """
+        cfg.ensure_dirs()
         try:
             if config_path:
                 os.environ['CDSAPI_RC'] = config_path
             
-            self.client = cdsapi.Client()
+            self.client = cdsapi.Client(wait_until_complete=False)
             logger.info("Cliente CDS inicializado correctamente")
             
         except Exception as e:
@@ -51,9 +173,9 @@ class CDSTools:
             Tupla con fechas validadas (start_date, end_date)
         """
         try:
-            # Convertir a objetos datetime
-            start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+            # Convertir a objetos date
+            start_dt = _parse_date(start_date)
+            end_dt = _parse_date(end_date)
             
             # Validar que start_date <= end_date
             if start_dt > end_dt:
@@ -80,7 +202,8 @@ class CDSTools:
             logger.error(f"Error al validar rango de fechas: {e}")
             raise
     
-    def _generate_date_lists(self, start_date: str, end_date: str) -> Tuple[List[str], List[str], List[str]]:
+    @staticmethod
+    def _generate_date_lists(start_date: str, end_date: str) -> Tuple[List[str], List[str], List[str]]:
         """
         Genera listas de años, meses y días para el rango solicitado.
         
@@ -91,32 +214,28 @@ class CDSTools:
         Returns:
             Tupla con listas de años, meses y días
         """
-        start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+        start_dt = _parse_date(start_date)
+        end_dt = _parse_date(end_date)
         
         # Generar años
-        years = list(range(start_dt.year, end_dt.year + 1))
+        years = [str(year) for year in range(start_dt.year, end_dt.year + 1)]
         
-        # Generar meses
+        # Generar meses (los slices de las constantes devuelven listas nuevas)
         if start_dt.year == end_dt.year:
-            months = list(range(start_dt.month, end_dt.month + 1))
+            months = MONTHS_ALL[start_dt.month - 1:end_dt.month]
         else:
             # Para múltiples años, incluir todos los meses
-            months = list(range(1, 13))
+            months = MONTHS_ALL[:]
         
         # Generar días
         if start_dt.month == end_dt.month and start_dt.year == end_dt.year:
-            days = list(range(start_dt.day, end_dt.day + 1))
+            days = DAYS_ALL[start_dt.day - 1:end_dt.day]
         else:
             # Para múltiples meses, incluir todos los días
-            days = list(range(1, 32))
+            days = DAYS_ALL[:]
         
-        return (
-            [str(year) for year in years],
-            [f'{month:02d}' for month in months],
-            [f'{day:02d}' for day in days]
-        )
-    
+        return years, months, days
+
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Limpia y formatea el DataFrame.
@@ -129,7 +248,7 @@ class CDSTools:
         """
         # Eliminar columnas innecesarias
         columns_to_drop = ['number', 'step', 'surface', 'valid_time', 'heightAboveGround']
-        df = df.drop(columns=[col for col in columns_to_drop if col in df.columns])
+        df = df.drop(columns=columns_to_drop, errors='ignore')
         
         # Renombrar columnas comunes
         rename_dict = {
@@ -140,19 +259,21 @@ class CDSTools:
             't': 'temperature',
             'tp': 'total_precipitation'
         }
-        df = df.rename(columns={col: rename_dict[col] for col in df.columns if col in rename_dict})
+        df = df.rename(columns=rename_dict)
         
         # Convertir temperatura de Kelvin a Celsius si existe
         temp_cols = [col for col in df.columns if 'temperature' in col.lower()]
-        for col in temp_cols:
-            if df[col].max() > 200:  # Asumir que está en Kelvin si los valores son altos
-                df[col] = df[col] - 273.15
-        
-        # Formatear datetime
+        if temp_cols:
+            arr = df[temp_cols].to_numpy(dtype=np.float64)
+            kelvin = np.nanmax(arr, axis=0) > 200  # Asumir que está en Kelvin si los valores son altos
+            arr[:, kelvin] -= 273.15
+            df[temp_cols] = arr
+
+        # Formatear datetime (date como datetime64[D] en lugar de objetos date)
         if 'datetime' in df.columns:
             df['datetime'] = pd.to_datetime(df['datetime'])
-            df['date'] = df['datetime'].dt.date
-            df['hour'] = df['datetime'].dt.hour
+            df['date'] = df['datetime'].values.astype('datetime64[D]')
+            df['hour'] = df['datetime'].dt.hour.astype('int8')
         
         return df
 
@@ -166,11 +287,14 @@ class CDSTools:
         latitude: float,
         longitude: float,
         radius: float = 0.5,
-        format: str = 'netcdf'  # Cambiado a netcdf por defecto
+        format: str = 'netcdf',  # Cambiado a netcdf por defecto
+        years: Optional[List[str]] = None,
+        months: Optional[List[str]] = None,
+        days: Optional[List[str]] = None
     ) -> Dict:
         """
         Construye los parámetros para la solicitud CDS.
-        
+
         Args:
             dataset: Nombre del dataset CDS
             product_type: Tipo de producto
@@ -181,7 +305,10 @@ class CDSTools:
             longitude: Longitud del centroide
             radius: Radio alrededor del centroide en grados
             format: Formato de respuesta ('grib' o 'netcdf')
-            
+            years: Lista explícita de años (por defecto se deriva de las fechas)
+            months: Lista explícita de meses (por defecto se deriva de las fechas)
+            days: Lista explícita de días (por defecto se deriva de las fechas)
+
         Returns:
             Diccionario con parámetros de la solicitud
         """
@@ -191,8 +318,9 @@ class CDSTools:
         if not (-180 <= longitude <= 180):
             raise ValueError("Longitud debe estar entre -180 y 180")
         
-        # Generar listas de fechas
-        years, months, days = self._generate_date_lists(start_date, end_date)
+        # Generar listas de fechas si no se pasaron explícitamente
+        if years is None or months is None or days is None:
+            years, months, days = self._generate_date_lists(start_date, end_date)
         
         # Calcular área alrededor del centroide
         north = min(latitude + radius, 90)
@@ -200,21 +328,34 @@ class CDSTools:
         west = max(longitude - radius, -180)
         east = min(longitude + radius, 180)
         
-        params = {
-            'product_type': product_type,
-            'variable': variable,
-            'year': years,
-            'month': months,
-            'day': days,
-            'time': [f'{h:02d}:00' for h in range(24)],
-            'area': [north, west, south, east],  # North, West, South, East
-            'format': format
-        }
+        params = self._base_params(product_type, variable, [north, west, south, east], format)
+        params['year'], params['month'], params['day'] = years, months, days
         
         logger.info(f"Parámetros de solicitud construidos para área: {north}N, {west}W, {south}S, {east}E")
         logger.info(f"Rango temporal: {start_date} a {end_date}")
         return params
     
+    def _base_params(self, product_type: str, variable: str, area: List[float], format: str) -> Dict:
+        """
+        Construye la parte de los parámetros común a todas las ventanas temporales.
+        
+        Args:
+            product_type: Tipo de producto
+            variable: Variable climática
+            area: Área [Norte, Oeste, Sur, Este]
+            format: Formato de respuesta ('grib' o 'netcdf')
+            
+        Returns:
+            Diccionario base sin 'year', 'month' ni 'day'
+        """
+        return {
+            'product_type': product_type,
+            'variable': variable,
+            'time': HOURS_ALL,
+            'area': area,  # North, West, South, East
+            'format': format
+        }
+    
     def download_data(
         self,
         dataset: str = 'reanalysis-era5-single-levels',
@@ -226,10 +367,13 @@ class CDSTools:
         longitude: float = -3.7038,
         radius: float = 0.5,
         output_format: str = 'netcdf'
-    ) -> Optional[str]:
+    ) -> Optional[List[str]]:
         """
         Descarga datos del CDS para un área alrededor de un centroide.
-        
+
+        El rango se divide en solicitudes mensuales que se envían en paralelo,
+        de modo que la espera en la cola del CDS se solapa entre ellas.
+
         Args:
             dataset: Dataset CDS a consultar
             product_type: Tipo de producto
@@ -240,54 +384,326 @@ class CDSTools:
             longitude: Longitud del centroide
             radius: Radio alrededor del centroide en grados
             output_format: Formato de salida ('grib' o 'netcdf')
-            
+
         Returns:
-            Ruta al archivo descargado o None si hay error
+            Lista de rutas a los archivos mensuales descargados o None si hay error
         """
         try:
             # Validar rango de fechas
             start_date, end_date = self.validate_date_range(start_date, end_date)
-            
-            # Construir parámetros
-            params = self.build_request_params(
+
+            # Crear directorio de salida
+            raw_dir = Path(f"{cfg.DATA_RAW}/copernicus")
+            raw_dir.mkdir(parents=True, exist_ok=True)
+
+            # Construir los parámetros una vez y variar sólo las fechas por mes
+            base_params = self.build_request_params(
                 dataset, product_type, variable, start_date, end_date,
                 latitude, longitude, radius, output_format
             )
             
-            # Crear directorio de salida
+            jobs = []
+            for sub_start, sub_end in enumerate_monthly_windows(start_date, end_date):
+                params = base_params.copy()
+                params['year'], params['month'], params['day'] = self._generate_date_lists(sub_start, sub_end)
+                filename = f"{dataset}_{variable}_{sub_start}_{sub_end}_{latitude}_{longitude}_{radius}.{output_format}"
+                jobs.append((params, raw_dir / filename))
 
-            raw_dir = Path(f"{cfg.DATA_RAW}/copernicus")
-            raw_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Iniciando descarga de datos para {variable} en {len(jobs)} solicitudes mensuales...")
+
+            # Realizar solicitudes en paralelo
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                futures = [
+                    executor.submit(self._retrieve, dataset, params, str(output_path))
+                    for params, output_path in jobs
+                ]
+                paths = [future.result() for future in futures]
+
+            logger.info(f"Datos descargados correctamente en: {raw_dir} ({len(paths)} archivos)")
+            return paths
+
+        except Exception as e:
+            logger.error(f"Error en la descarga de datos: {e}")
+            return None
+
+    def _retrieve(self, dataset: str, params: Dict, output_path: str) -> str:
+        """
+        Realiza una solicitud al CDS respetando el límite de solicitudes simultáneas.
+
+        Args:
+            dataset: Dataset CDS a consultar
+            params: Parámetros de la solicitud
+            output_path: Ruta del archivo de salida
+
+        Returns:
+            Ruta al archivo descargado
+        """
+        with _request_slots:
+            logger.info(f"Parámetros de la solicitud: {params}")
+            retrieve_with_resume(self.client, dataset, params, output_path)
+        logger.info(f"Archivo descargado: {output_path}")
+        return output_path
+
+    def _open_downloads(self, paths: Union[str, List[str]], engine: Optional[str] = None, **open_kwargs) -> xr.Dataset:
+        """
+        Abre uno o varios archivos descargados como un único Dataset.
+
+        Args:
+            paths: Ruta o lista de rutas a los archivos mensuales
+            engine: Engine de xarray a utilizar (None para autodetectar)
+            **open_kwargs: Argumentos adicionales para xr.open_dataset
+
+        Returns:
+            Dataset con los archivos combinados por coordenadas
+        """
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+
+        return xr.open_mfdataset(
+            [str(path) for path in paths],
+            engine=engine,
+            combine='by_coords',
+            parallel=True,
+            chunks={'time': 240},
+            **open_kwargs
+        )
+
+    def _point_to_dataframe(self, ds_point: xr.Dataset) -> pd.DataFrame:
+        """
+        Construye el DataFrame de una serie puntual directamente desde los arrays.
+        
+        Evita el índice MultiIndex intermedio de to_dataframe(); si alguna
+        variable tiene dimensiones además del tiempo se usa la conversión general.
+        
+        Args:
+            ds_point: Dataset ya seleccionado en un único punto
             
-            # Nombre del archivo de salida
-            filename = f"{dataset}_{start_date}_{end_date}_{latitude}_{longitude}.{output_format}"
-            output_path = raw_dir / filename
+        Returns:
+            DataFrame con una fila por paso temporal
+        """
+        time_name = next((dim for dim in ('time', 'valid_time') if dim in ds_point.dims), None)
+        if time_name is None or any(var.dims != (time_name,) for var in ds_point.data_vars.values()):
+            return ds_point.to_dataframe().reset_index()
+        
+        data = {
+            time_name: ds_point[time_name].values,
+            'latitude': ds_point['latitude'].item(),
+            'longitude': ds_point['longitude'].item()
+        }
+        data.update({name: var.values for name, var in ds_point.data_vars.items()})
+        return pd.DataFrame(data)
+
+    def _decode_point_dataframe(self, df: pd.DataFrame, ds_point: xr.Dataset) -> pd.DataFrame:
+        """
+        Aplica a una serie puntual la decodificación CF omitida al abrir el archivo.
+        
+        Convierte las columnas de tiempo ('<unidad> since <origen>') a datetime y
+        aplica _FillValue, scale_factor y add_offset a las variables empaquetadas.
+        
+        Args:
+            df: DataFrame construido a partir de un Dataset sin decodificar
+            ds_point: Dataset puntual con los atributos CF originales
             
-            logger.info(f"Iniciando descarga de datos para {variable}...")
-            logger.info(f"Parámetros de la solicitud: {params}")
+        Returns:
+            DataFrame con tiempos y valores decodificados
+        """
+        for col in df.columns:
+            if col not in ds_point.variables:
+                continue
+            attrs = ds_point[col].attrs
+            
+            units = attrs.get('units', '')
+            if ' since ' in units:
+                unit, origin = units.split(' since ', 1)
+                df[col] = pd.to_datetime(df[col], unit=CF_TIME_UNITS[unit.strip()], origin=pd.Timestamp(origin))
+                continue
+            
+            fill_value = attrs.get('_FillValue', attrs.get('missing_value'))
+            if fill_value is None and 'scale_factor' not in attrs and 'add_offset' not in attrs:
+                continue
+            
+            raw = df[col].to_numpy()
+            values = raw.astype(np.float64)
+            if fill_value is not None:
+                values[raw == fill_value] = np.nan
+            df[col] = values * attrs.get('scale_factor', 1.0) + attrs.get('add_offset', 0.0)
+        
+        return df
+
+    def _grib_point_series(self, paths: List[str], latitude: float, longitude: float) -> pd.DataFrame:
+        """
+        Extrae la serie temporal de la celda más cercana recorriendo los mensajes GRIB.
+        
+        Usa eccodes directamente, sin construir el índice ni el arreglo completo
+        (tiempo x lat x lon) que genera cfgrib; la memoria es O(tiempo).
+        
+        Args:
+            paths: Rutas a los archivos GRIB
+            latitude: Latitud del punto de interés
+            longitude: Longitud del punto de interés
             
-            # Realizar solicitud
-            self.client.retrieve(
-                dataset,
-                params,
-                str(output_path)
-            )
+        Returns:
+            DataFrame con columnas time, latitude, longitude y una por variable
+        """
+        import eccodes
+        
+        records = []
+        nearest = {}  # Índice de la celda más cercana por definición de grilla
+        for path in paths:
+            with open(path, 'rb') as f:
+                while (gid := eccodes.codes_grib_new_from_file(f)) is not None:
+                    try:
+                        grid_key = eccodes.codes_get(gid, 'md5GridSection')
+                        if grid_key not in nearest:
+                            lats = eccodes.codes_get_array(gid, 'latitudes')
+                            lons = eccodes.codes_get_array(gid, 'longitudes')
+                            idx = int(np.argmin((lats - latitude) ** 2 + (lons - longitude) ** 2))
+                            nearest[grid_key] = (idx, lats[idx], lons[idx])
+                        idx, cell_lat, cell_lon = nearest[grid_key]
+                        
+                        value = eccodes.codes_get_values(gid)[idx]
+                        if value == eccodes.codes_get(gid, 'missingValue'):
+                            value = np.nan
+                        
+                        records.append((
+                            eccodes.codes_get(gid, 'validityDate'),
+                            eccodes.codes_get(gid, 'validityTime'),
+                            cell_lat,
+                            cell_lon,
+                            eccodes.codes_get(gid, 'cfVarName'),
+                            value
+                        ))
+                    finally:
+                        eccodes.codes_release(gid)
+        
+        long_df = pd.DataFrame(records, columns=['date', 'hhmm', 'latitude', 'longitude', 'variable', 'value'])
+        long_df['time'] = (pd.to_datetime(long_df['date'].astype(str), format='%Y%m%d')
+                           + pd.to_timedelta(long_df['hhmm'] // 100, unit='h'))
+        
+        # pivot (índice único: un mensaje por variable y paso) conserva los pasos sin datos,
+        # igual que la ruta NetCDF; pivot_table los descartaría con dropna=True
+        df = long_df.pivot(index=['time', 'latitude', 'longitude'], columns='variable', values='value')
+        df.columns.name = None
+        return df.reset_index()
+
+    def _default_output_name(self, paths: Union[str, List[str]]) -> str:
+        """Devuelve el nombre base del primer archivo descargado."""
+        if isinstance(paths, (str, Path)):
+            return Path(paths).stem
+        return Path(paths[0]).stem
+
+    def _build_time_index(self, raw_dir: Path) -> Dict[str, List[str]]:
+        """
+        Construye el índice fecha -> archivos NetCDF disponibles en raw_dir.
+        
+        El índice se persiste en JSON y sólo se reconstruye si algún archivo
+        NetCDF es más reciente que él.
+        
+        Args:
+            raw_dir: Directorio con las descargas del CDS
             
-            logger.info(f"Datos descargados correctamente en: {output_path}")
-            return str(output_path)
+        Returns:
+            Diccionario con fechas ISO (YYYY-MM-DD) como clave y nombres de archivo como valor
+        """
+        index_path = raw_dir / TIME_INDEX_FILENAME
+        nc_files = sorted(f for f in raw_dir.iterdir() if f.suffix in NETCDF_SUFFIXES)
+        
+        if index_path.exists():
+            index_mtime = index_path.stat().st_mtime
+            if all(f.stat().st_mtime <= index_mtime for f in nc_files):
+                time_index = orjson.loads(index_path.read_bytes())
+                
+                # Quitar del índice los archivos borrados desde que se construyó
+                existing = {f.name for f in nc_files}
+                pruned = {day: kept for day, names in time_index.items()
+                          if (kept := [name for name in names if name in existing])}
+                if pruned != time_index:
+                    index_path.write_bytes(orjson.dumps(pruned))
+                return pruned
+        
+        logger.info(f"Construyendo índice temporal de {len(nc_files)} archivos en {raw_dir}")
+        time_index = {}
+        for nc_file in nc_files:
+            try:
+                with xr.open_dataset(nc_file, decode_times=True) as ds:
+                    time_name = 'time' if 'time' in ds.coords else 'valid_time'
+                    days = np.unique(ds[time_name].values.astype('datetime64[D]'))
+            except Exception as e:
+                logger.warning(f"No se pudo indexar {nc_file}: {e}")
+                continue
+            
+            for day in days.astype(str):
+                time_index.setdefault(day, []).append(nc_file.name)
+        
+        index_path.write_bytes(orjson.dumps(time_index))
+        return time_index
+
+    def _find_cached_files(
+        self,
+        dataset: str,
+        variable: str,
+        start_date: str,
+        end_date: str,
+        latitude: float,
+        longitude: float,
+        radius: float
+    ) -> Optional[List[str]]:
+        """
+        Busca archivos ya descargados que cubran todo el rango solicitado.
+        
+        Args:
+            dataset: Dataset CDS de la descarga
+            variable: Variable climática
+            start_date: Fecha de inicio
+            end_date: Fecha de fin
+            latitude: Latitud del centroide
+            longitude: Longitud del centroide
+            radius: Radio alrededor del centroide en grados
             
-        except Exception as e:
-            logger.error(f"Error en la descarga de datos: {e}")
+        Returns:
+            Lista de rutas que cubren el rango o None si falta algún día
+        """
+        raw_dir = Path(f"{cfg.DATA_RAW}/copernicus")
+        if not raw_dir.exists():
             return None
-    
-    def process_netcdf_to_dataframe(self, netcdf_path: str, latitude: float, longitude: float) -> Optional[pd.DataFrame]:   
+        
+        time_index = self._build_time_index(raw_dir)
+        prefix = f"{dataset}_{variable}_"
+        location = f"_{latitude}_{longitude}_{radius}"
+        
+        selected = set()
+        for day in pd.date_range(start_date, end_date, freq='D').strftime('%Y-%m-%d'):
+            files = [
+                name for name in time_index.get(day, [])
+                if name.startswith(prefix) and Path(name).stem.endswith(location)
+            ]
+            if not files:
+                return None
+            selected.update(files)
+        
+        logger.info(f"Usando {len(selected)} archivos ya descargados para {variable}")
+        return sorted(str(raw_dir / name) for name in selected)
+
+    def process_netcdf_to_dataframe(
+        self,
+        netcdf_path: Union[str, List[str]],
+        latitude: float,
+        longitude: float,
+        output_name: Optional[str] = None,
+        drop_variables: Optional[List[str]] = None
+    ) -> Optional[pd.DataFrame]:
         """
         Procesa archivo NetCDF y extrae datos para el punto de coordenadas.
         
+        A diferencia de CopernicusTools, no se genera una copia Zarr: los archivos
+        se leen una única vez para extraer la serie puntual, que se guarda en Parquet.
+        
         Args:
-            netcdf_path: Ruta al archivo NetCDF
+            netcdf_path: Ruta al archivo NetCDF o lista de archivos mensuales
             latitude: Latitud del punto de interés
             longitude: Longitud del punto de interés
+            output_name: Nombre base del archivo Parquet (por defecto, el del primer archivo)
+            drop_variables: Variables que no se leen del archivo
             
         Returns:
             DataFrame con los datos procesados o None si hay error
@@ -295,18 +711,25 @@ class CDSTools:
         try:
             logger.info(f"Procesando archivo NetCDF: {netcdf_path}")
             
-            # Leer archivo NetCDF con xarray
-            ds = xr.open_dataset(netcdf_path)
+            # Cada archivo mensual trae su propio empaquetado (scale_factor, add_offset,
+            # _FillValue) y open_mfdataset conserva sólo los atributos del primero:
+            # la decodificación CF se difiere al punto seleccionado sólo con un único archivo
+            paths = [netcdf_path] if isinstance(netcdf_path, (str, Path)) else list(netcdf_path)
+            decode_point = len(paths) == 1
+            ds = self._open_downloads(paths, decode_cf=not decode_point, drop_variables=drop_variables)
             
             # Seleccionar el punto más cercano a las coordenadas dadas
+            # .load() lee desde disco sólo los chunks que contienen ese punto
             ds_point = ds.sel(
                 latitude=latitude,
                 longitude=longitude,
                 method='nearest'
-            )
+            ).load()
             
             # Convertir a DataFrame
-            df = ds_point.to_dataframe().reset_index()
+            df = self._point_to_dataframe(ds_point)
+            if decode_point:
+                df = self._decode_point_dataframe(df, ds_point)
             
             # Limpiar y formatear el DataFrame
             # df = self._clean_dataframe(df)
@@ -315,11 +738,12 @@ class CDSTools:
             processed_dir = Path('../data/raw/copernicus')
             processed_dir.mkdir(parents=True, exist_ok=True)
             
-            csv_filename = Path(netcdf_path).stem + '.csv'
-            csv_path = processed_dir / csv_filename
+            parquet_filename = (output_name or self._default_output_name(netcdf_path)) + '.parquet'
+            parquet_path = processed_dir / parquet_filename
             
-            df.to_csv(csv_path, index=False)
-            logger.info(f"Datos procesados guardados en: {csv_path}")
+            # Parquet conserva los tipos y evita reparsear texto al releer
+            df.to_parquet(parquet_path, compression='zstd', index=False)
+            logger.info(f"Datos procesados guardados en: {parquet_path}")
             
             return df
             
@@ -327,14 +751,21 @@ class CDSTools:
             logger.error(f"Error al procesar archivo NetCDF: {e}")
             return None
     
-    def process_grib_to_dataframe(self, grib_path: str, latitude: float, longitude: float) -> Optional[pd.DataFrame]:
+    def process_grib_to_dataframe(
+        self,
+        grib_path: Union[str, List[str]],
+        latitude: float,
+        longitude: float,
+        output_name: Optional[str] = None
+    ) -> Optional[pd.DataFrame]:
         """
         Procesa archivo GRIB y extrae datos para el punto de coordenadas.
         
         Args:
-            grib_path: Ruta al archio GRIB
+            grib_path: Ruta al archio GRIB o lista de archivos mensuales
             latitude: Latitud del punto de interés
             longitude: Longitud del punto de interés
+            output_name: Nombre base del archivo Parquet (por defecto, el del primer archivo)
             
         Returns:
             DataFrame con los datos procesados o None si hay error
@@ -342,18 +773,9 @@ class CDSTools:
         try:
             logger.info(f"Procesando archivo GRIB: {grib_path}")
             
-            # Leer archivo GRIB con xarray usando cfgrib
-            ds = xr.open_dataset(grib_path, engine='cfgrib')
-            
-            # Seleccionar el punto más cercano a las coordenadas dadas
-            ds_point = ds.sel(
-                latitude=latitude,
-                longitude=longitude,
-                method='nearest'
-            )
-            
-            # Convertir a DataFrame
-            df = ds_point.to_dataframe().reset_index()
+            # Leer mensaje a mensaje sólo el valor de la celda más cercana
+            paths = [grib_path] if isinstance(grib_path, (str, Path)) else grib_path
+            df = self._grib_point_series(paths, latitude, longitude)
             
             # Limpiar y formatear el DataFrame
             df = self._clean_dataframe(df)
@@ -362,11 +784,11 @@ class CDSTools:
             processed_dir = Path('./data/processed')
             processed_dir.mkdir(parents=True, exist_ok=True)
             
-            csv_filename = Path(grib_path).stem + '.csv'
-            csv_path = processed_dir / csv_filename
+            parquet_filename = (output_name or self._default_output_name(grib_path)) + '.parquet'
+            parquet_path = processed_dir / parquet_filename
             
-            df.to_csv(csv_path, index=False)
-            logger.info(f"Datos procesados guardados en: {csv_path}")
+            df.to_parquet(parquet_path, compression='zstd', index=False)
+            logger.info(f"Datos procesados guardados en: {parquet_path}")
             
             return df
             
@@ -384,7 +806,8 @@ class CDSTools:
         latitude: float = 40.4168,
         longitude: float = -3.7038,
         radius: float = 0.5,
-        format: str = 'netcdf'  # Usar NetCDF por defecto
+        format: str = 'netcdf',  # Usar NetCDF por defecto
+        dataset: str = 'reanalysis-era5-single-levels'
     ) -> Optional[pd.DataFrame]:
         """
         Método principal para obtener y procesar datos climáticos.
@@ -397,30 +820,43 @@ class CDSTools:
             longitude: Longitud del centroide
             radius: Radio alrededor del centroide
             format: Formato de descarga ('grib' o 'netcdf')
+            dataset: Dataset CDS a consultar
             
         Returns:
             DataFrame con datos procesados o None si hay error
         """
         try:
-            # Descargar datos
-            file_path = self.download_data(
-                variable=variable,
-                start_date=start_date,
-                end_date=end_date,
-                latitude=latitude,
-                longitude=longitude,
-                radius=radius,
-                output_format=format
-            )
+            # Validar antes de buscar en caché: el rango puede recortarse a 12 meses
+            start_date, end_date = self.validate_date_range(start_date, end_date)
             
-            if not file_path:
+            # Reutilizar descargas previas que cubran el rango
+            file_paths = None
+            if format.lower() != 'grib':
+                file_paths = self._find_cached_files(dataset, variable, start_date, end_date,
+                                                     latitude, longitude, radius)
+            
+            # Descargar datos
+            if not file_paths:
+                file_paths = self.download_data(
+                    dataset=dataset,
+                    variable=variable,
+                    start_date=start_date,
+                    end_date=end_date,
+                    latitude=latitude,
+                    longitude=longitude,
+                    radius=radius,
+                    output_format=format
+                )
+            
+            if not file_paths:
                 return None
             
             # Procesar datos según el formato
+            output_name = f"{variable}_{start_date}_{end_date}_{latitude}_{longitude}"
             if format.lower() == 'grib':
-                df = self.process_grib_to_dataframe(file_path, latitude, longitude)
+                df = self.process_grib_to_dataframe(file_paths, latitude, longitude, output_name)
             else:  # netcdf por defecto
-                df = self.process_netcdf_to_dataframe(file_path, latitude, longitude)
+                df = self.process_netcdf_to_dataframe(file_paths, latitude, longitude, output_name)
             
             return df
             
@@ -3,15 +3,69 @@ import xarray as xr
 import pandas as pd
 import logging
 import os
+import shutil
+import hashlib
 from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from project_config import ProjectConfig as cfg
+from cds_tools import retrieve_with_resume, enumerate_monthly_windows, MAX_CONCURRENT_REQUESTS
 
 logger = logging.getLogger(__name__)
 
+# Chunks de la copia Zarr: series temporales largas sobre pocas celdas
+ZARR_CHUNKS = {'time': 720, 'latitude': 8, 'longitude': 8}
+
+
+def _sniff_engine(filepath):
+    """Elige el engine de xarray según los primeros bytes del archivo"""
+    with open(filepath, 'rb') as f:
+        head = f.read(4)
+    if head.startswith(b'GRIB'):
+        return 'cfgrib'
+    if head.startswith(b'\x89HDF'):
+        return 'h5netcdf'  # NetCDF-4 (HDF5)
+    if head.startswith(b'CDF'):
+        return 'scipy'  # NetCDF clásico
+    return 'netcdf4'
+
+
+@dataclass(frozen=True)
+class Era5Request:
+    """Solicitud ERA5 de una única variable para una ventana temporal"""
+    dataset: str
+    variable: str
+    start_date: str
+    end_date: str
+    area: tuple  # (N, O, S, E)
+    data_format: str
+    times: tuple = ('00:00', '06:00', '12:00', '18:00')
+
+    @property
+    def params(self):
+        """Parámetros de la solicitud para cdsapi"""
+        return {
+            'product_type': 'reanalysis',
+            'variable': [self.variable],
+            'date': f'{self.start_date}/{self.end_date}',
+            'area': list(self.area),
+            'time': list(self.times),
+            'format': self.data_format
+        }
+
+    @property
+    def filename(self):
+        """Nombre derivado del contenido: solicitudes idénticas comparten archivo"""
+        digest = hashlib.sha1(repr(self).encode()).hexdigest()[:12]
+        extension = 'grib' if self.data_format == 'grib' else 'nc'
+        return f"{self.dataset}_{self.variable}_{self.start_date}_{digest}.{extension}"
+
+
 class CopernicusTools:
     def __init__(self) :
         self.config = cfg
-        self.client = cdsapi.Client()
+        cfg.ensure_dirs()
+        self.client = cdsapi.Client(wait_until_complete=False)
         self.raw_data_path = Path(f"{cfg.DATA_RAW}/copernicus")
     
     def get_meteorological_data(self, mode = 'land'):
@@ -32,29 +86,7 @@ class CopernicusTools:
 
         try:
             logger.info(f"Iniciando descarga de datos ERA5-Land: {variables}")
-            
-            filename = f"era5_land_{self.config.START_DATE}_{self.config.END_DATE}.nc"
-            filepath = self.raw_data_path / filename
-            
-            if filepath.exists():
-                logger.info(f"Archivo ya existe: {filepath}")
-                return self.__load_file(filepath)
-            
-            request_params = {
-                'product_type': 'reanalysis',
-                'variable': variables,
-                'date': f'{self.config.START_DATE}/{self.config.END_DATE}',
-                'area': [self.config.BBOX[3], self.config.BBOX[0], 
-                            self.config.BBOX[1], self.config.BBOX[2]],  # [N, O, S, E]
-                'time': ['00:00', '06:00', '12:00', '18:00'],
-                'format': 'netcdf'
-            }
-            
-            logger.debug(f"Parámetros de solicitud: {request_params}")
-            self.client.retrieve('reanalysis-era5-land', request_params, str(filepath))
-            
-            logger.info(f"Datos descargados exitosamente: {filepath}")
-            return self.__load_file(filepath)
+            return self.__download_era5('reanalysis-era5-land', variables, 'netcdf', 'era5_land')
 
         except Exception as e:
             logger.error(f"Error descargando datos ERA5-Land: {e}")
@@ -76,43 +108,105 @@ class CopernicusTools:
 
         try:
             logger.info(f"Iniciando descarga de datos ERA5-Levels: {variables}")
-
-            filename = f"era5_levels_{self.config.START_DATE}_{self.config.END_DATE}.nc"
-            filepath = self.raw_data_path / filename
-            
-            if filepath.exists():
-                logger.info(f"Archivo ya existe: {filepath}")
-                return self.__load_file(filepath)
-            
-            request_params = {
-                'product_type': 'reanalysis',
-                'variable': variables,
-                'date': f'{self.config.START_DATE}/{self.config.END_DATE}',
-                'area': [self.config.BBOX[3], self.config.BBOX[0], 
-                            self.config.BBOX[1], self.config.BBOX[2]],  # [N, O, S, E]
-                'time': ['00:00', '06:00', '12:00', '18:00'],
-                'format': 'grib'
-            }
-            
-            logger.debug(f"Parámetros de solicitud: {request_params}")
-            self.client.retrieve('reanalysis-era5-single-levels', request_params, str(filepath))
-            
-            logger.info(f"Datos descargados exitosamente: {filepath}")
-            return self.__load_file(filepath)
+            return self.__download_era5('reanalysis-era5-single-levels', variables, 'grib', 'era5_levels')
 
         except Exception as e:
-            logger.error(f"Error descargando datos ERA5-Land: {e}")
+            logger.error(f"Error descargando datos ERA5-Levels: {e}")
             return None
-    
+
+    def __download_era5(self, dataset, variables, data_format, name):
+        """Descarga un dataset ERA5 en solicitudes por variable y mes y las combina"""
+        area = (self.config.BBOX[3], self.config.BBOX[0],
+                self.config.BBOX[1], self.config.BBOX[2])  # [N, O, S, E]
+
+        # La copia Zarr depende de las variables y el área, no sólo del rango de fechas
+        digest = hashlib.sha1(repr((dataset, tuple(variables), area, data_format)).encode()).hexdigest()[:12]
+        zarr_path = self.raw_data_path / f"{name}_{self.config.START_DATE}_{self.config.END_DATE}_{digest}.zarr"
+        if zarr_path.exists():
+            logger.info(f"Archivo ya existe: {zarr_path}")
+            return xr.open_zarr(zarr_path)
+        era5_requests = [
+            Era5Request(dataset, variable, sub_start, sub_end, area, data_format)
+            for variable in variables
+            for sub_start, sub_end in enumerate_monthly_windows(self.config.START_DATE, self.config.END_DATE)
+        ]
+        filepaths = [self.raw_data_path / request.filename for request in era5_requests]
+
+        # Las piezas ya descargadas (mismo contenido -> mismo nombre) se omiten
+        pending = [(request, filepath) for request, filepath in zip(era5_requests, filepaths)
+                   if not filepath.exists()]
+        logger.info(f"{len(era5_requests)} solicitudes, {len(pending)} pendientes de descarga")
+
+        self.raw_data_path.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            futures = []
+            for request, filepath in pending:
+                logger.debug(f"Parámetros de solicitud: {request.params}")
+                futures.append(executor.submit(
+                    retrieve_with_resume, self.client, request.dataset, request.params, str(filepath)
+                ))
+            for future in futures:
+                future.result()
+
+        logger.info(f"Datos descargados exitosamente: {self.raw_data_path}")
+        ds = xr.combine_by_coords(
+            [self.__load_file(filepath) for filepath in filepaths],
+            compat='override',
+            combine_attrs='drop_conflicts'
+        )
+        return self.__to_zarr(ds, zarr_path)
+
     def __load_file(self, filepath):
         """Carga archivo NetCDF o GRIB con el engine apropiado"""
-        engines = ['netcdf4', 'h5netcdf', 'scipy', 'cfgrib']
-        for eng in engines:
-            try:
-                ds = xr.open_dataset(filepath, engine=eng)
-                logger.info(f"Archivo cargado con engine {eng}: {filepath}")
-                return ds
-            except Exception as e:
-                logger.debug(f"No se pudo abrir con {eng}: {e}")
-        logger.error(f"No se pudo abrir el archivo con ninguno de los engines: {filepath}")
-        return None
+        engine = _sniff_engine(filepath)
+        try:
+            ds = xr.open_dataset(filepath, engine=engine)
+        except OSError as e:
+            logger.debug(f"No se pudo abrir con {engine}, se deja elegir a xarray: {e}")
+            engine = None
+            ds = xr.open_dataset(filepath)
+
+        chunks = self.__disk_chunks(ds)
+        if chunks:
+            # Reabrir de forma perezosa (dask) con los chunks del archivo
+            ds.close()
+            ds = xr.open_dataset(filepath, engine=engine, chunks=chunks)
+        logger.info(f"Archivo cargado con engine {engine}: {filepath}")
+        return ds
+
+    def __disk_chunks(self, ds):
+        """Obtiene el tamaño de chunk en disco de cada dimensión del dataset"""
+        chunks = {}
+        for var in ds.data_vars.values():
+            chunksizes = var.encoding.get('chunksizes')
+            if chunksizes:
+                chunks.update(zip(var.dims, chunksizes))
+        return chunks
+
+    def __to_zarr(self, ds, zarr_path):
+        """Transcodifica el dataset descargado a Zarr para lecturas posteriores"""
+        import numcodecs
+
+        try:
+            chunks = {dim: size for dim, size in ZARR_CHUNKS.items() if dim in ds.dims}
+            ds_zarr = ds.chunk(chunks)
+
+            # Descartar la codificación del archivo original (chunks, compresión y
+            # empaquetado int16): cada archivo mensual trae su propio scale_factor/add_offset,
+            # así que se guardan los valores ya decodificados en punto flotante
+            for var in ds_zarr.variables.values():
+                var.encoding = {k: v for k, v in var.encoding.items()
+                                if k in ('units', 'calendar')}
+
+            compressor = numcodecs.Blosc(cname='zstd', clevel=3, shuffle=numcodecs.Blosc.BITSHUFFLE)
+            encoding = {var: {'compressor': compressor} for var in ds_zarr.data_vars}
+            ds_zarr.to_zarr(zarr_path, mode='w', encoding=encoding)
+            logger.info(f"Copia Zarr guardada: {zarr_path}")
+
+            ds.close()
+            return xr.open_zarr(zarr_path)
+
+        except Exception as e:
+            logger.warning(f"No se pudo generar la copia Zarr {zarr_path}: {e}")
+            shutil.rmtree(zarr_path, ignore_errors=True)
+            return ds
@@ -1,8 +1,11 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import DBSCAN
 
+# Límites de FRP (MW) y etiquetas de las categorías de intensidad
+INTENSITY_BINS = [50, 200, 500]
+INTENSITY_LABELS = ['Leve', 'Moderado', 'Intenso', 'Extremo']
+
 def integrate_environmental_data(fire_data, env_data_path):
     """Integra datos de incendios con variables ambientales"""
     # Cargar datos ambientales (ejemplo: temperatura, humedad, viento)
@@ -19,33 +22,31 @@ def cluster_fire_events(fire_data):
     """Agrupa incendios en clusters para análisis de patrones"""
     # Seleccionar variables para clustering
     cluster_vars = ['brightness', 'frp', 'confidence', 'bright_t31']
-    X = fire_data[cluster_vars].dropna()
+    X = fire_data[cluster_vars].dropna().to_numpy(np.float32)
     
-    # Estandarizar
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Estandarizar en el lugar (columnas constantes quedan sin escalar)
+    X -= X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1
+    X /= std
     
-    # Clustering
-    dbscan = DBSCAN(eps=0.5, min_samples=5)
-    fire_data['cluster'] = dbscan.fit_predict(X_scaled)
+    # Clustering (ball tree evita la matriz de distancias densa)
+    dbscan = DBSCAN(eps=0.5, min_samples=5, algorithm='ball_tree', n_jobs=-1)
+    fire_data['cluster'] = dbscan.fit_predict(X)
     
     return fire_data
 
 def analyze_fire_intensity(fire_data):
     """Analiza la intensidad y comportamiento del fuego"""
-    # Clasificar intensidad del incendio
-    conditions = [
-        (fire_data['frp'] < 50),
-        (fire_data['frp'] < 200),
-        (fire_data['frp'] < 500),
-        (fire_data['frp'] >= 500)
-    ]
-    choices = ['Leve', 'Moderado', 'Intenso', 'Extremo']
+    # Clasificar intensidad del incendio: <50, <200, <500, >=500 MW
+    frp = fire_data['frp'].to_numpy(dtype=np.float64)
+    codes = np.digitize(frp, INTENSITY_BINS)
+    codes[np.isnan(frp)] = -1  # Sin FRP -> categoría faltante
     
-    fire_data['intensity_category'] = np.select(conditions, choices)
+    fire_data['intensity_category'] = pd.Categorical.from_codes(codes, categories=INTENSITY_LABELS)
     
     # Estadísticas por categoría
-    intensity_stats = fire_data.groupby('intensity_category').agg({
+    intensity_stats = fire_data.groupby('intensity_category', observed=True).agg({
         'frp': ['mean', 'std', 'count'],
         'brightness': 'mean',
         'confidence': 'mean'
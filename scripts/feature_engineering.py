@@ -1,43 +1,105 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+import math
+import warnings
+
+try :
+    from numba import njit, prange
+except ImportError :
+    njit = None
+
+# Radio medio de la Tierra, para expresar eps de DBSCAN en kilómetros
+EARTH_RADIUS_KM = 6371.0
+
+# Códigos fijos por satélite FIRMS (MODIS: Terra/Aqua; VIIRS: S-NPP, NOAA-20, NOAA-21)
+# para que la codificación no dependa de los satélites presentes en cada corrida
+SATELLITE_CODES = {'Terra': 0, 'Aqua': 1, 'N': 2, 'N20': 3, '1': 3, 'N21': 4}
+
+if njit is not None :
+    @njit(parallel=True, cache=True)
+    def _intensity_kernel(frp, bright, bt31, out_log, out_ratio) :
+        """log1p(frp) y brightness/bright_t31 en una sola pasada (NaN si bright_t31 es 0)"""
+        for i in prange(frp.size) :
+            out_log[i] = math.log1p(frp[i])
+            b = bt31[i]
+            out_ratio[i] = bright[i] / b if b != 0 else np.nan
 
 def create_ml_features(fire_data):
     """Crea features para modelo de ML"""
-    features = fire_data.copy()
+    # Sólo se calculan las columnas nuevas; las originales no se copian
+    features = {}
     
     # 1. Features temporales
-    features['acq_datetime'] = pd.to_datetime(
-        features['acq_date'] + ' ' + features['acq_time'].astype(str).str.zfill(4),
-        format='%Y-%m-%d %H%M'
+    # acq_time viene como HHMM entero: se suma como timedelta sin pasar por strings
+    acq_time = fire_data['acq_time'].astype('int32')
+    features['acq_datetime'] = (
+        pd.to_datetime(fire_data['acq_date'], format='%Y-%m-%d')
+        + pd.to_timedelta(acq_time // 100, unit='h')
+        + pd.to_timedelta(acq_time % 100, unit='m')
     )
-    features['hour_sin'] = np.sin(2 * np.pi * features['acq_datetime'].dt.hour / 24)
-    features['hour_cos'] = np.cos(2 * np.pi * features['acq_datetime'].dt.hour / 24)
-    features['day_of_year_sin'] = np.sin(2 * np.pi * features['acq_datetime'].dt.dayofyear / 365)
-    features['day_of_year_cos'] = np.cos(2 * np.pi * features['acq_datetime'].dt.dayofyear / 365)
+    dt = features['acq_datetime'].dt
+    features['hour_sin'], features['hour_cos'] = cyclical_encoding(dt.hour, 24)
+    features['day_of_year_sin'], features['day_of_year_cos'] = cyclical_encoding(dt.dayofyear, 365)
     
     # 2. Features de intensidad
-    features['frp_log'] = np.log1p(features['frp'])
-    features['brightness_ratio'] = features['brightness'] / features['bright_t31']
+    features['frp_log'], features['brightness_ratio'] = intensity_features(
+        fire_data['frp'], fire_data['brightness'], fire_data['bright_t31']
+    )
     
     # 3. Features espaciales (podrías agregar elevación, uso de suelo, etc.)
-    features['spatial_cluster'] = create_spatial_clusters(features)
+    features['spatial_cluster'] = create_spatial_clusters(fire_data)
     
     # 4. Features categóricas
-    le = LabelEncoder()
-    features['satellite_encoded'] = le.fit_transform(features['satellite'])
-    features['is_night'] = (features['daynight'] == 'N').astype(int)
+    # Satélites desconocidos quedan como -1
+    features['satellite_encoded'] = (
+        fire_data['satellite'].map(SATELLITE_CODES).astype('float32').fillna(-1).astype('int8')
+    )
+    features['is_night'] = (fire_data['daynight'] == 'N').to_numpy().view(np.int8)
     
-    return features
+    new_cols = pd.DataFrame(features, index=fire_data.index)
+    # drop copia: sólo se usa si alguna columna ya existía (p. ej. acq_datetime)
+    overlap = fire_data.columns.intersection(new_cols.columns)
+    base = fire_data.drop(columns=overlap) if len(overlap) else fire_data
+    return pd.concat([base, new_cols], axis=1, copy=False)
 
-def create_spatial_clusters(fire_data, eps=0.1, min_samples=3):
-    """Crea clusters espaciales usando DBSCAN"""
+def intensity_features(frp, brightness, bright_t31):
+    """Devuelve (log1p(frp), brightness/bright_t31) en float32; el cociente es NaN si bright_t31 es 0"""
+    frp = np.asarray(frp, dtype=np.float32)
+    brightness = np.asarray(brightness, dtype=np.float32)
+    bright_t31 = np.asarray(bright_t31, dtype=np.float32)
+    
+    if njit is not None:
+        frp_log = np.empty_like(frp)
+        ratio = np.empty_like(frp)
+        _intensity_kernel(frp, brightness, bright_t31, frp_log, ratio)
+        return frp_log, ratio
+    
+    ratio = np.full_like(frp, np.nan)
+    np.divide(brightness, bright_t31, out=ratio, where=bright_t31 != 0)
+    return np.log1p(frp), ratio
+
+def cyclical_encoding(values, period):
+    """Devuelve (seno, coseno) en float32 de una variable cíclica en una sola pasada"""
+    # e^(iθ) = cos θ + i·sin θ: una exponencial compleja en lugar de sin y cos por separado
+    angle = np.exp(2j * np.pi * np.asarray(values, dtype=np.float32) / period)
+    return angle.imag.astype(np.float32), angle.real.astype(np.float32)
+
+def create_spatial_clusters(fire_data, eps_km=1.0, min_samples=3, eps=None):
+    """Crea clusters espaciales usando DBSCAN con distancia haversine (eps en km)"""
     from sklearn.cluster import DBSCAN
-    from sklearn.preprocessing import StandardScaler
     
-    coords = fire_data[['latitude', 'longitude']].values
-    scaler = StandardScaler()
-    coords_scaled = scaler.fit_transform(coords)
+    if eps is not None:
+        # Compatibilidad: eps (sin unidades) se aplicaba sobre lat/lon estandarizadas
+        warnings.warn(
+            "create_spatial_clusters(eps=...) está obsoleto: usar eps_km (distancia haversine en km)",
+            DeprecationWarning, stacklevel=2
+        )
+        from sklearn.preprocessing import StandardScaler
+        coords_scaled = StandardScaler().fit_transform(fire_data[['latitude', 'longitude']].values)
+        return DBSCAN(eps=eps, min_samples=min_samples).fit_predict(coords_scaled)
+    
+    coords_rad = np.radians(fire_data[['latitude', 'longitude']].to_numpy(dtype=np.float64))
     
-    dbscan = DBSCAN(eps=eps, min_samples=min_samples)
-    return dbscan.fit_predict(coords_scaled)
\ No newline at end of file
+    dbscan = DBSCAN(eps=eps_km / EARTH_RADIUS_KM, min_samples=min_samples,
+                    metric='haversine', algorithm='ball_tree', n_jobs=-1)
+    return dbscan.fit_predict(coords_rad)
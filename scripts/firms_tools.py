@@ -1,35 +1,147 @@
-import requests
+import io
+import requests_cache
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+from collections import deque
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from io import StringIO
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 
 from project_config import ProjectConfig as cfg
 
+try :
+    from numba import njit, prange
+except ImportError :
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# Descargas simultáneas de chunks (y tamaño del pool de conexiones)
+MAX_WORKERS = 12
+
+# Tipos explícitos para el parseo del CSV de FIRMS
+FIRMS_DTYPES = {
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'brightness': 'float32',
+    'bright_t31': 'float32',
+    'bright_ti4': 'float32',
+    'bright_ti5': 'float32',
+    'scan': 'float32',
+    'track': 'float32',
+    'frp': 'float32',
+    'acq_date': str,
+    # Baja cardinalidad: categóricas desde el parseo ('source' se asigna aparte)
+    'satellite': 'category',
+    'daynight': 'category'
+}
+
+# Días tras los cuales un chunk se considera definitivo (los productos estándar de FIRMS
+# se completan y reprocesan con un retraso de hasta ~3 meses)
+CHUNK_CACHE_MIN_AGE_DAYS = 90
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 86_400_000_000_000
+
+if njit is not None :
+    @njit(parallel=True, cache=True)
+    def _extract_time_components(ns, hour_out, doy_out, month_out) :
+        """Hora, día del año y mes en una sola pasada sobre datetime64[ns] como int64"""
+        for i in prange(ns.shape[0]) :
+            days = ns[i] // NS_PER_DAY
+            hour_out[i] = (ns[i] - days * NS_PER_DAY) // NS_PER_HOUR
+
+            # Fecha civil a partir de días desde 1970-01-01 (años contados desde marzo)
+            z = days + 719468
+            era = z // 146097
+            doe = z - era * 146097
+            yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+            doy_mar = doe - (365 * yoe + yoe // 4 - yoe // 100)
+            mp = (5 * doy_mar + 2) // 153
+
+            if mp < 10 :
+                month_out[i] = mp + 3
+                year = yoe + era * 400
+                leap = (year % 4 == 0 and year % 100 != 0) or year % 400 == 0
+                doy_out[i] = doy_mar + 60 + (1 if leap else 0)
+            else :
+                month_out[i] = mp - 9
+                doy_out[i] = doy_mar - 305
+
+def _concat_tables(tables) :
+    """
+    Concatena tablas de distintas fuentes conservando los tipos de cada columna; las ausentes quedan nulas.
+    - confidence es int16 (0-100 %) en MODIS y letra ('l'/'n'/'h') en VIIRS: si se mezclan fuentes,
+      en el combinado se guarda como texto. Los archivos por fuente conservan su tipo original.
+    - Otros numéricos distintos entre fuentes se promueven a float64.
+    """
+    fields = {}
+    for table in tables :
+        for field in table.schema :
+            known = fields.setdefault(field.name, field.type)
+            if known == field.type :
+                continue
+            if field.name == 'confidence' :
+                fields[field.name] = pa.string()
+            elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (known, field.type)) :
+                fields[field.name] = pa.float64()
+            elif pa.types.is_dictionary(known) and pa.types.is_dictionary(field.type) \
+                    and known.value_type == field.type.value_type :
+                fields[field.name] = pa.dictionary(pa.int32(), known.value_type)
+            else :
+                raise TypeError(f"Tipos incompatibles para '{field.name}': {known} y {field.type}")
+
+    schema = pa.schema(list(fields.items()))
+    aligned = [
+        pa.Table.from_arrays(
+            [
+                table[name].cast(type_) if name in table.column_names else pa.nulls(table.num_rows, type_)
+                for name, type_ in fields.items()
+            ],
+            schema = schema
+        )
+        for table in tables
+    ]
+    return pa.concat_tables(aligned)
+
 class FIRMSTools :
 
-    def __init__(self) :
-        self.config = cfg
-        self.raw_data_path = Path(f"{cfg.DATA_RAW}/firms")
+    def __init__(self, config = None) :
+        self.config = config or cfg
+        self.config.ensure_dirs()
+        self.raw_data_path = Path(f"{self.config.DATA_RAW}/firms")
         self.raw_data_path.mkdir(parents = True, exist_ok = True)
         self.session = self._create_session()
     
     def _create_session(self) :
-        """Crea una sesión con reintentos automáticos"""
-        session = requests.Session()
+        """Crea una sesión con caché en disco y reintentos automáticos"""
+        # La URL ya codifica fuente, bbox y fechas: re-ejecuciones sólo piden chunks nuevos
+        session = requests_cache.CachedSession(
+            str(self.raw_data_path / '.http_cache'),
+            backend = 'sqlite',
+            expire_after = timedelta(days = 1),
+            allowable_codes = (200,)
+        )
         retry_strategy = Retry(
             total = 3,
             backoff_factor = 0.5,
             status_forcelist = [429, 500, 502, 503, 504],
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            max_retries = retry_strategy,
+            pool_connections = MAX_WORKERS,
+            pool_maxsize = MAX_WORKERS
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
+        # El CSV comprime muy bien: pedir br/zstd además de gzip cuando urllib3 los soporta
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
         return session
     
     def _validate_api_key(self) :
@@ -49,9 +161,24 @@ class FIRMSTools :
             yield start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d")
             start = chunk_end + timedelta(days=1)
 
-    def _download_chunk(self, source, bbox, start_date, end_date) :
+    def _download_chunk(self, source, bbox, start_date, end_date, force_refresh = False) :
         """Descarga un fragmento de datos para un rango de fechas <= 10 días"""
 
+        # Chunks ya descargados se leen de disco salvo que se fuerce la descarga
+        cache_path = self.raw_data_path / f"_chunk_{source}_{start_date}_{end_date}.parquet"
+        if cache_path.exists() and not force_refresh :
+            cached = pd.read_parquet(cache_path)
+            if not cached.empty :
+                logger.info(f"Chunk en caché: {cache_path.name}")
+                return cached
+
+        # Sólo chunks fuera de la ventana de reprocesamiento son definitivos y se guardan en disco;
+        # los recientes dependen de la caché HTTP (expira en 1 día)
+        persist = (
+            datetime.strptime(end_date, "%Y-%m-%d")
+            < datetime.now() - timedelta(days = CHUNK_CACHE_MIN_AGE_DAYS)
+        )
+
         day_range = (datetime.strptime(end_date, "%Y-%m-%d") - 
                      datetime.strptime(start_date, "%Y-%m-%d")).days + 1
 
@@ -63,29 +190,41 @@ class FIRMSTools :
 
         logger.info(f"Request FIRMS {source} -> {start_date} to {end_date} | URL: {url}")
 
-        response = self.session.get(url, timeout=30)
-        if response.status_code != 200:
-            logger.error(f"Error HTTP {response.status_code} para {source}")
-            return pd.DataFrame()
+        with self.session.get(url, timeout=30) as response:
+            if response.status_code != 200:
+                logger.error(f"Error HTTP {response.status_code} para {source}")
+                return pd.DataFrame()
 
-        try:
-            data = pd.read_csv(StringIO(response.text))
-            if "acq_date" in data.columns:
-                data = data[
-                    (data["acq_date"] >= start_date) &
-                    (data["acq_date"] <= end_date)
-                ]
-            return data
-        except Exception as e:
-            logger.error(f"Error procesando CSV para {source}: {e}")
-            return pd.DataFrame()
+            try:
+                # La caché ya guarda el cuerpo completo: parsear los bytes sin decodificar a str
+                data = pd.read_csv(io.BytesIO(response.content), dtype=FIRMS_DTYPES, engine='c')
 
-    def get_fire_data(self, sources) :
+                # MODIS informa la confianza en % (0-100); VIIRS como 'l'/'n'/'h'
+                if 'confidence' in data.columns and pd.api.types.is_integer_dtype(data['confidence']):
+                    data['confidence'] = data['confidence'].astype('int16')
+                if "acq_date" in data.columns:
+                    acq_date = data["acq_date"]
+                    if acq_date.is_monotonic_increasing:
+                        # Suele venir ordenado: recortar por posición evita la máscara y la copia
+                        lo = acq_date.searchsorted(start_date, side='left')
+                        hi = acq_date.searchsorted(end_date, side='right')
+                        data = data.iloc[lo:hi]
+                    else:
+                        data = data[(acq_date >= start_date) & (acq_date <= end_date)]
+                if persist and not data.empty :
+                    data.to_parquet(cache_path, compression='zstd', index=False)
+                return data
+            except Exception as e:
+                logger.error(f"Error procesando CSV para {source}: {e}")
+                return pd.DataFrame()
+
+    def get_fire_data(self, sources, force_refresh = False) :
         """
         Descarga datos de múltiples fuentes FIRMS en el rango de fechas dado (iterando por chunks de 10 días).
         - sources: lista de fuentes (sin NRT).
         - start_date, end_date: str 'YYYY-MM-DD'
         - bbox: [lon_min, lat_min, lon_max, lat_max]
+        - force_refresh: ignora los chunks guardados y vuelve a descargarlos
         """
 
         start_date = self.config.START_DATE
@@ -95,35 +234,59 @@ class FIRMSTools :
         if not self._validate_api_key() :
             return None
 
-        all_data = []
-        for source in sources :
-            source_frames = []
-            for chunk_start, chunk_end in self._daterange_chunks(start_date, end_date):
-                df = self._download_chunk(source, bbox, chunk_start, chunk_end)
-                if not df.empty :
-                    df["source"] = source
-                    source_frames.append(df)
+        # Descargar todos los chunks de todas las fuentes en paralelo
+        tasks = [
+            (source, chunk_start, chunk_end)
+            for source in sources
+            for chunk_start, chunk_end in self._daterange_chunks(start_date, end_date)
+        ]
+        source_categories = list(dict.fromkeys(sources))
+        source_paths = {}
+        writers = {}
+        try :
+            with ThreadPoolExecutor(max_workers = MAX_WORKERS) as executor :
+                futures = deque(
+                    (source, executor.submit(self._download_chunk, source, bbox, chunk_start, chunk_end, force_refresh))
+                    for source, chunk_start, chunk_end in tasks
+                )
+                # Escribir cada chunk en cuanto llega, en orden de envío (cronológico),
+                # y soltar el futuro para no retener todos los chunks en memoria
+                while futures :
+                    source, future = futures.popleft()
+                    df = future.result()
+                    if df.empty :
+                        continue
 
-            if source_frames :
-                source_data = pd.concat(source_frames, ignore_index=True)
+                    codes = np.full(len(df), source_categories.index(source), dtype=np.int8)
+                    table = pa.Table.from_pandas(
+                        df.assign(source = pd.Categorical.from_codes(codes, categories=source_categories)),
+                        preserve_index = False
+                    )
+                    writer = writers.get(source)
+                    if writer is None :
+                        source_paths[source] = self.raw_data_path / f"firms_{source}_{start_date}_{end_date}.parquet"
+                        writer = writers[source] = pq.ParquetWriter(source_paths[source], table.schema, compression='zstd')
+                    else :
+                        table = table.cast(writer.schema)
+                    writer.write_table(table)
+        finally :
+            for writer in writers.values() :
+                writer.close()
 
-                # Guardar por fuente
-                filename = f"firms_{source}_{start_date}_{end_date}.csv"
-                filepath = self.raw_data_path / filename
-                source_data.to_csv(filepath, index=False)
-                logger.info(f"Datos guardados: {filepath} ({len(source_data)} registros)")
+        if not source_paths :
+            logger.warning("No se obtuvieron datos de ninguna fuente")
+            return pd.DataFrame()
 
-                all_data.append(source_data)
+        for source, filepath in source_paths.items() :
+            logger.info(f"Datos guardados: {filepath}")
 
-        if all_data :
-            combined_data = pd.concat(all_data, ignore_index=True)
-            combined_path = self.raw_data_path / f"firms_combined_{start_date}_{end_date}.csv"
-            combined_data.to_csv(combined_path, index=False)
-            logger.info(f"Datos combinados guardados: {combined_path}")
-            return combined_data
+        # El combinado se arma en Arrow a partir de los archivos por fuente
+        combined_table = _concat_tables([pq.read_table(path) for path in source_paths.values()])
+        combined_path = self.raw_data_path / f"firms_combined_{start_date}_{end_date}.parquet"
+        pq.write_table(combined_table, combined_path, compression='zstd')
+        logger.info(f"Datos combinados guardados: {combined_path} ({combined_table.num_rows} registros)")
 
-        logger.warning("No se obtuvieron datos de ninguna fuente")
-        return pd.DataFrame()
+        return combined_table.to_pandas()
 
     def process_fire_data(self, raw_data) :
         """Procesa los datos brutos de FIRMS para análisis"""
@@ -134,16 +297,28 @@ class FIRMSTools :
 
         # Convertir fecha y hora
         if 'acq_date' in processed_data.columns and 'acq_time' in processed_data.columns:
-            processed_data['acq_datetime'] = pd.to_datetime(
-                processed_data['acq_date'] + ' ' + processed_data['acq_time'].astype(str).str.zfill(4),
-                format='%Y-%m-%d %H%M',
-                errors='coerce'
+            # acq_time viene como HHMM entero: se suma como timedelta sin pasar por strings
+            acq_time = pd.to_numeric(processed_data['acq_time'], errors='coerce')
+            processed_data['acq_datetime'] = (
+                pd.to_datetime(processed_data['acq_date'], format='%Y-%m-%d', errors='coerce')
+                + pd.to_timedelta(acq_time // 100, unit='h')
+                + pd.to_timedelta(acq_time % 100, unit='m')
             )
 
         # Extraer componentes de tiempo
-        if 'acq_datetime' in processed_data.columns:
-            processed_data['acq_hour'] = processed_data['acq_datetime'].dt.hour
-            processed_data['acq_dayofyear'] = processed_data['acq_datetime'].dt.dayofyear
-            processed_data['acq_month'] = processed_data['acq_datetime'].dt.month
+        if 'acq_datetime' in processed_data.columns and njit is not None and not processed_data['acq_datetime'].hasnans:
+            # Una sola pasada compilada en lugar de tres accesos .dt
+            ns = processed_data['acq_datetime'].to_numpy().view('i8')
+            hour, doy, month = (np.empty(len(ns), dtype=np.int16) for _ in range(3))
+            _extract_time_components(ns, hour, doy, month)
+            processed_data['acq_hour'] = hour
+            processed_data['acq_dayofyear'] = doy
+            processed_data['acq_month'] = month
+        elif 'acq_datetime' in processed_data.columns:
+            # Mismos tipos que la versión compilada; con fechas faltantes, int16 nullable
+            dtype = 'Int16' if processed_data['acq_datetime'].hasnans else np.int16
+            processed_data['acq_hour'] = processed_data['acq_datetime'].dt.hour.astype(dtype)
+            processed_data['acq_dayofyear'] = processed_data['acq_datetime'].dt.dayofyear.astype(dtype)
+            processed_data['acq_month'] = processed_data['acq_datetime'].dt.month.astype(dtype)
 
         return processed_data
\ No newline at end of file
@@ -1,25 +1,71 @@
 import pandas as pd
+import numpy as np
 import requests
-from datetime import datetime
+import hashlib
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 import logging
+from typing import List, Optional
 
 import openmeteo_requests as openmeteo
 import requests_cache
 from retry_requests import retry
 
+from project_config import ProjectConfig as cfg
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Ventanas anuales descargadas en simultáneo (y tamaño del pool de conexiones)
+MAX_WORKERS = 8
+
+# Días tras los cuales una ventana se considera definitiva y se cachea en disco
+CACHE_MIN_AGE_DAYS = 5
+
+# Versión del esquema de las ventanas cacheadas; incrementarla al cambiar tipos o columnas
+CACHE_SCHEMA_VERSION = 2
+
+# Variables horarias solicitadas; la respuesta las devuelve en este mismo orden
+HOURLY_VARIABLES = (
+    'temperature_2m', 'relative_humidity_2m', 'pressure_msl',
+    'precipitation', 'rain', 'snowfall', 'cloud_cover',
+    'wind_speed_10m', 'wind_direction_10m', 'wind_gusts_10m',
+    'visibility', 'is_day', 'sunshine_duration'
+)
+
+# Variables enteras y acotadas que caben en tipos más angostos que float32.
+# Se usan tipos nullable para que todas las ventanas tengan el mismo esquema,
+# haya o no faltantes (NaN -> <NA>)
+NARROW_DTYPES = {
+    'is_day': 'boolean',             # 0/1 (booleano bit-packed en Parquet)
+    'cloud_cover': 'UInt8',          # 0-100 %
+    'wind_direction_10m': 'Int16'    # 0-360°
+}
+
 class OpenMeteoWeather :
 
     def __init__(self) :
         """
         Inicializa el fetcher de datos meteorológicos con Open-Meteo.
         """
+        cfg.ensure_dirs()
         self.base_url = "https://archive-api.open-meteo.com/v1/archive"
         self.cache_session = requests_cache.CachedSession('.cache', expire_after = -1)
+        self.cache_dir = cfg.BASE_DIR / "data" / "cache" / "open_meteo"
+        self.cache_dir.mkdir(parents = True, exist_ok = True)
         self.retry_session = retry(self.cache_session, retries = 5, backoff_factor = 0.2)
+        # Pool de conexiones del tamaño de las descargas concurrentes (manteniendo los reintentos)
+        retry_adapter = self.retry_session.get_adapter(self.base_url)
+        self.retry_session.mount("https://", HTTPAdapter(
+            max_retries = retry_adapter.max_retries,
+            pool_connections = MAX_WORKERS,
+            pool_maxsize = MAX_WORKERS
+        ))
+        # Anunciar sólo las compresiones que urllib3 puede decodificar (br/zstd si están instalados)
+        self.retry_session.headers['Accept-Encoding'] = ACCEPT_ENCODING
         self.client = openmeteo.Client(session = self.retry_session)
     
     def _validate_dates(self, start_date: str, end_date: str) -> None :
@@ -34,14 +80,15 @@ class OpenMeteoWeather :
             ValueError: Si las fechas no son válidas
         """
         try:
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+            # date.fromisoformat está implementado en C: más rápido que strptime
+            start_dt = date.fromisoformat(start_date)
+            end_dt = date.fromisoformat(end_date)
             
             if start_dt > end_dt:
                 raise ValueError("La fecha inicial no puede ser mayor que la fecha final")
             
             # Verificar que las fechas no sean futuras
-            if start_dt > datetime.now():
+            if start_dt > date.today():
                 raise ValueError("Las fechas no pueden ser futuras")
                 
             # Open-Meteo tiene datos desde 1940 aproximadamente
@@ -51,96 +98,132 @@ class OpenMeteoWeather :
         except ValueError as e:
             raise ValueError(f"Formato de fecha inválido: {e}")
     
-    def get_meteorological_data(self, start_date: str, end_date: str, bbox: str) -> pd.DataFrame :
+    @staticmethod
+    def _yearly_windows(start_date: str, end_date: str) :
         """
-        Obtiene datos históricos del clima de Open-Meteo y los convierte en DataFrame
+        Divide el rango de fechas en ventanas de a lo sumo un año calendario
         
         Args:
-            lat (float): Latitud
-            lon (float): Longitud
             start_date (str): Fecha inicial en formato YYYY-MM-DD
             end_date (str): Fecha final en formato YYYY-MM-DD
-            bbox (str): Bounding box en formato "min_lon,min_lat,max_lon,max_lat"
             
         Returns:
-            pd.DataFrame: DataFrame con los datos meteorológicos
+            list: Pares (inicio, fin) en formato YYYY-MM-DD
         """
-        # Validar fechas
-        self._validate_dates(start_date, end_date)
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
         
-        # logger.info(f"Obteniendo datos para coordenadas: ({lat}, {lon})")
-        logger.info(f"Período: {start_date} hasta {end_date}")
+        windows = []
+        while start <= end:
+            window_end = min(date(start.year, 12, 31), end)
+            windows.append((start.isoformat(), window_end.isoformat()))
+            start = date(start.year + 1, 1, 1)
+        return windows
+    
+    def _fetch_window(self, start_date: str, end_date: str, bbox: str, variables: List[str]) -> pd.DataFrame :
+        """
+        Descarga una ventana de fechas y la convierte en DataFrame
         
+        Args:
+            start_date (str): Fecha inicial en formato YYYY-MM-DD
+            end_date (str): Fecha final en formato YYYY-MM-DD
+            bbox (str): Bounding box en formato "min_lon,min_lat,max_lon,max_lat"
+            variables (List[str]): Variables horarias a solicitar, en orden
+            
+        Returns:
+            pd.DataFrame: DataFrame con los datos meteorológicos de la ventana
+        """
         # Parámetros para la API de Open-Meteo
         params = {
             'latitude': 52.52,
             'longitude': 13.41,
             'start_date': start_date,
             'end_date': end_date,
-            'hourly': [
-                'temperature_2m', 'relative_humidity_2m', 'pressure_msl',
-                'precipitation', 'rain', 'snowfall', 'cloud_cover',
-                'wind_speed_10m', 'wind_direction_10m', 'wind_gusts_10m',
-                'visibility', 'is_day', 'sunshine_duration'
-            ],
+            'hourly': variables,
             "bounding_box": bbox,
             'timezone': 'America/Argentina/Mendoza',
             'models': 'era5'  # Reanálisis ERA5 de ECMWF (datos de alta calidad)
         }
         
-        try:
-            responses = self.client.weather_api(self.base_url, params = params)
+        # Ventanas ya históricas (ERA5 tarda ~5 días en consolidarse) no cambian: se cachean procesadas
+        cache_path = self.cache_dir / f"{hashlib.blake2b(repr((CACHE_SCHEMA_VERSION, sorted(params.items()))).encode()).hexdigest()[:16]}.parquet"
+        immutable = date.fromisoformat(end_date) < date.today() - timedelta(days = CACHE_MIN_AGE_DAYS)
+        if immutable and cache_path.exists():
+            logger.info(f"Ventana {start_date} a {end_date} leída de caché: {cache_path.name}")
+            return pd.read_parquet(cache_path)
+        
+        responses = self.client.weather_api(self.base_url, params = params)
 
-            for response in responses:
-                print(f"\nCoordinates: {response.Latitude()}°N {response.Longitude()}°E")
-                print(f"Elevation: {response.Elevation()} m asl")
-                print(f"Timezone difference to GMT+0: {response.UtcOffsetSeconds()}s")
-                
-                # Process hourly data. The order of variables needs to be the same as requested.
+        for response in responses:
+            print(f"\nCoordinates: {response.Latitude()}°N {response.Longitude()}°E")
+            print(f"Elevation: {response.Elevation()} m asl")
+            print(f"Timezone difference to GMT+0: {response.UtcOffsetSeconds()}s")
+            
+            # Process hourly data. The order of variables needs to be the same as requested.
 
-                hourly = response.Hourly()
-                hourly_temperature_2m = hourly.Variables(0).ValuesAsNumpy()
-                hourly_relative_humidity_2m = hourly.Variables(1).ValuesAsNumpy()
-                hourly_precipitation = hourly.Variables(2).ValuesAsNumpy()
-                hourly_rain = hourly.Variables(3).ValuesAsNumpy()
-                hourly_snow_depth = hourly.Variables(4).ValuesAsNumpy()
-                hourly_snowfall = hourly.Variables(5).ValuesAsNumpy()
-                hourly_wind_speed_100m = hourly.Variables(6).ValuesAsNumpy()
-                hourly_wind_direction_100m = hourly.Variables(7).ValuesAsNumpy()
-                hourly_soil_temperature_100_to_255cm = hourly.Variables(8).ValuesAsNumpy()
-                hourly_soil_moisture_100_to_255cm = hourly.Variables(9).ValuesAsNumpy()
-                hourly_apparent_temperature = hourly.Variables(10).ValuesAsNumpy()
-                hourly_dew_point_2m = hourly.Variables(11).ValuesAsNumpy()
-                hourly_surface_pressure = hourly.Variables(12).ValuesAsNumpy()
-                
-                hourly_data = {"date": pd.date_range(
-                    start = pd.to_datetime(hourly.Time(), unit = "s", utc = True),
-                    end = pd.to_datetime(hourly.TimeEnd(), unit = "s", utc = True),
-                    freq = pd.Timedelta(seconds = hourly.Interval()),
-                    inclusive = "left"
-                )}
+            hourly = response.Hourly()
+            dates = pd.date_range(
+                start = pd.to_datetime(hourly.Time(), unit = "s", utc = True),
+                end = pd.to_datetime(hourly.TimeEnd(), unit = "s", utc = True),
+                freq = pd.Timedelta(seconds = hourly.Interval()),
+                inclusive = "left"
+            )
+
+            # Un único bloque float32 en lugar de una columna por variable
+            values = np.empty((len(dates), len(variables)), dtype = np.float32)
+            for i in range(len(variables)):
+                values[:, i] = hourly.Variables(i).ValuesAsNumpy()
 
-                hourly_data["latitude"] = response.Latitude()
-                hourly_data["longitude"] = response.Longitude()
-                hourly_data["elevation"] = response.Elevation()                
-                hourly_data["temperature_2m"] = hourly_temperature_2m
-                hourly_data["relative_humidity_2m"] = hourly_relative_humidity_2m
-                hourly_data["precipitation"] = hourly_precipitation
-                hourly_data["rain"] = hourly_rain
-                hourly_data["snow_depth"] = hourly_snow_depth
-                hourly_data["snowfall"] = hourly_snowfall
-                hourly_data["wind_speed_100m"] = hourly_wind_speed_100m
-                hourly_data["wind_direction_100m"] = hourly_wind_direction_100m
-                hourly_data["soil_temperature_100_to_255cm"] = hourly_soil_temperature_100_to_255cm
-                hourly_data["soil_moisture_100_to_255cm"] = hourly_soil_moisture_100_to_255cm
-                hourly_data["apparent_temperature"] = hourly_apparent_temperature
-                hourly_data["dew_point_2m"] = hourly_dew_point_2m
-                hourly_data["surface_pressure"] = hourly_surface_pressure
+            hourly_data = pd.DataFrame(values, columns = variables, copy = False)
+            for name, dtype in NARROW_DTYPES.items():
+                if name not in variables:
+                    continue
+                hourly_data[name] = pd.array(np.rint(values[:, variables.index(name)]), dtype = dtype)
+            hourly_data.insert(0, "elevation", response.Elevation())
+            hourly_data.insert(0, "longitude", response.Longitude())
+            hourly_data.insert(0, "latitude", response.Latitude())
+            hourly_data.insert(0, "date", dates)
 
-                return pd.DataFrame(data = hourly_data)
+            if immutable:
+                hourly_data.to_parquet(cache_path, engine = 'pyarrow', compression = 'zstd', index = False)
+            return hourly_data
+    
+    def get_meteorological_data(self, start_date: str, end_date: str, bbox: str,
+                                variables: Optional[List[str]] = None) -> pd.DataFrame :
+        """
+        Obtiene datos históricos del clima de Open-Meteo y los convierte en DataFrame.
+        Los rangos de varios años se piden en ventanas anuales concurrentes.
+        
+        Args:
+            start_date (str): Fecha inicial en formato YYYY-MM-DD
+            end_date (str): Fecha final en formato YYYY-MM-DD
+            bbox (str): Bounding box en formato "min_lon,min_lat,max_lon,max_lat"
+            variables (List[str], optional): Subconjunto de HOURLY_VARIABLES a descargar
+                (por defecto, todas); sólo se piden y decodifican esas columnas
+            
+        Returns:
+            pd.DataFrame: DataFrame con los datos meteorológicos
+        """
+        # Validar fechas
+        self._validate_dates(start_date, end_date)
+        
+        # logger.info(f"Obteniendo datos para coordenadas: ({lat}, {lon})")
+        logger.info(f"Período: {start_date} hasta {end_date}")
+        
+        windows = self._yearly_windows(start_date, end_date)
+        variables = list(variables or HOURLY_VARIABLES)
+        
+        try:
+            with ThreadPoolExecutor(max_workers = min(MAX_WORKERS, len(windows))) as executor:
+                frames = list(executor.map(lambda window: self._fetch_window(*window, bbox, variables), windows))
         except requests.exceptions.RequestException as e:
             logger.error(f"Error en la solicitud a la API: {e}")
             raise
         except Exception as e:
             logger.error(f"Error inesperado: {e}")
-            raise
\ No newline at end of file
+            raise
+        
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index = True, copy = False)
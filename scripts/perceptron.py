@@ -1,11 +1,46 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
+
+try :
+    from numba import njit
+except ImportError :
+    njit = None
+
+if njit is not None :
+    @njit(cache=True)
+    def _perceptron_epoch(x, y, w, b, lr) :
+        # Una época muestra a muestra (mismas actualizaciones que el bucle de train);
+        # modifica w (p, 1) y b (1,) en el lugar y devuelve el número de errores.
+        errors = 0
+        for i in range(x.shape[0]) :
+            z = b[0]
+            for j in range(x.shape[1]) :
+                z += x[i, j] * w[j, 0]
+            error = y[i] - (1 if z >= 0 else -1)
+            if error != 0 :
+                for j in range(x.shape[1]) :
+                    w[j, 0] += lr * error * x[i, j]
+                b[0] += lr * error
+                errors += 1
+        return errors
+
+def _fit_one(x, y, epochs, learning_rate, seed) :
+    # Un reinicio independiente: inicialización aleatoria propia y entrenamiento secuencial.
+    np.random.seed(seed)
+    perceptron = Perceptron(input_size = x.shape[1], learning_rate = learning_rate)
+    perceptron.train(x, y, perceptron.w, epochs = epochs)
+    # Sin resultados, train no corta en la convergencia: tomar la primera época sin errores.
+    zero_error = np.flatnonzero(np.asarray(perceptron.error_history) == 0)
+    convergence_epoch = int(zero_error[0]) + 1 if zero_error.size else epochs
+    accuracy = perceptron.accuracy_history[-1] if perceptron.accuracy_history else 0.0
+    return perceptron.w, perceptron.b, convergence_epoch, accuracy
 
 class Perceptron() :
 
     def __init__(self, input_size, learning_rate = 0.01) :
-        self.w = np.random.randn(input_size, 1)
-        self.b = np.random.randn(1)
+        self.w = np.random.randn(input_size, 1).astype(np.float32)
+        self.b = np.random.randn(1).astype(np.float32)
         self.learning_rate = learning_rate
 
         self.error_history = []
@@ -14,9 +49,9 @@ class Perceptron() :
 
     def evaluar_cota(self, x, y, w, steps) :
 
-        R = (np.max(np.linalg.norm(x, axis=1))) ** 2 # R^2
-        rho = np.min(y * (x @ w).flatten()) ** 2 # ρ^2
-        nsq_w = np.linalg.norm(w, ord = 2) ** 2 # ||w*||^2
+        R = np.einsum('ij,ij->i', x, x).max() # R^2 (normas al cuadrado sin sqrt intermedia)
+        rho = np.min(y * (x @ w).ravel()) ** 2 # ρ^2
+        nsq_w = float(np.vdot(w, w)) # ||w*||^2
 
         # bound = R / (rho * nsq_w)
         bound = (R * nsq_w) / rho
@@ -36,14 +71,31 @@ class Perceptron() :
         y = np.where((x @ w) >= 0, 1, -1) # Etiquetas según el hiperplano
         return x, y.flatten(), w
 
+    @classmethod
+    def train_ensemble(cls, x, y, n_restarts = 10, epochs = 100, learning_rate = 0.01, n_jobs = -1) :
+        # Entrena n_restarts perceptrones con distintas semillas en procesos paralelos.
+        # Devuelve una lista de (w, b, época de convergencia, precisión final) por reinicio.
+        return Parallel(n_jobs = n_jobs, prefer = 'processes')(
+            delayed(_fit_one)(x, y, epochs, learning_rate, seed) for seed in range(n_restarts)
+        )
+
     def predict(self, x) :
         z = np.dot(x, self.w) + self.b # Cálculo de la salida linea.
         return np.where(z >= 0, 1, -1) # Función escalón.
 
-    def train(self, x , y, w, epochs = 100, resultados = False) :
+    def _predict_batch(self, X) :
+        # Un solo producto matricial para todas las filas; devuelve etiquetas 1-D en int8.
+        # Signo sin ramas: (z >= 0) -> {0, 1} -> {-1, 1}.
+        return ((((X @ self.w).ravel() + self.b) >= 0).astype(np.int8) << 1) - 1
 
+    def train(self, x , y, w, epochs = 100, resultados = False, batch = False) :
+        # batch = True: una actualización agregada por época (X.T @ err) en lugar de muestra a muestra.
+        # El modo secuencial (por defecto) es el que cubre la cota de convergencia de evaluar_cota.
+
+        # Datos y pesos en float32 (como los inicializa __init__), aunque lleguen en float64.
+        x = np.asarray(x, dtype=np.float32)
         self.training_data = (x, y)
-        self.w = w
+        self.w = np.asarray(w, dtype=np.float32)
         convergence_epoch = epochs
 
         # Información inicial del entrenamiento.
@@ -57,23 +109,40 @@ class Perceptron() :
             print(f"Bias inicial: {self.b[0]:.4f}")
             print("-" * 50)
         
+        if batch :
+            y_batch = np.asarray(y, dtype=np.int8) # Etiquetas ±1 en int8 para el error por lotes.
+
         for epoch in range(epochs) : # Por cada epoca...
             
             # Contadores de errores y aciertos.
             errors = 0
             correct = 0
 
-            # Por cada muestra/registro...
-            for i in range(len(x)) :
-                y_pred = self.predict(x[i]) # Se predice la clase.
-                error = y[i] - y_pred # En base a la predicción se determina el error / residuo.
+            if batch :
+                # Predicción de todas las muestras en un solo producto matricial.
+                error = y_batch - self._predict_batch(x)
+                mask = error != 0
+                errors = int(np.count_nonzero(mask))
+                correct = len(x) - errors
+                if errors :
+                    self.w += self.learning_rate * (x[mask].T @ error[mask]).reshape(-1, 1)
+                    self.b += self.learning_rate * error[mask].sum()
+            elif njit is not None :
+                # Mismo recorrido secuencial, compilado.
+                errors = _perceptron_epoch(x, y, self.w, self.b, self.learning_rate)
+                correct = len(x) - errors
+            else :
+                # Por cada muestra/registro...
+                for i in range(len(x)) :
+                    y_pred = self.predict(x[i]) # Se predice la clase.
+                    error = y[i] - y_pred # En base a la predicción se determina el error / residuo.
 
-                if error != 0 : # Si es diferente de cero
-                    self.w += self.learning_rate * error * x[i].reshape(-1, 1) # Ajusto el vector de pesos y...
-                    self.b += self.learning_rate * error # el valor de bias.
-                    errors += 1 # Sumo el error al contador.
-                else : # Sino...
-                    correct += 1 # Sumo el acierto al contador.
+                    if error != 0 : # Si es diferente de cero
+                        self.w += self.learning_rate * error * x[i].reshape(-1, 1) # Ajusto el vector de pesos y...
+                        self.b += self.learning_rate * error # el valor de bias.
+                        errors += 1 # Sumo el error al contador.
+                    else : # Sino...
+                        correct += 1 # Sumo el acierto al contador.
 
             accuracy = correct / len(x) # Calculo la precisión.
             self.error_history.append(errors) # Registro el número de errores.
@@ -117,15 +186,23 @@ class Perceptron() :
         print(f"Pesos finales: {self.w.flatten().round(4)}")
         print(f"Bias final: {self.b[0]:.4f}")
         
-        y_pred = self.predict(x).flatten()
+        y_pred = self._predict_batch(x)
         correct = np.sum(y_pred == y)
         incorrect = n - correct
         
         print(f"Correctas: {correct}/{n}")
         print(f"Incorrectas: {incorrect}/{n}")
 
-    def plot_training_history(self):
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+    def plot_training_history(self, axes = None):
+        # axes: par de ejes de una llamada anterior para redibujar sin crear otra figura
+        # (p. ej. al monitorear varias corridas); en ese caso no se muestra la frontera.
+        if axes is None:
+            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+        else:
+            ax1, ax2 = axes
+            fig = ax1.figure
+            ax1.cla()
+            ax2.cla()
         
         # Gráfico de errores
         ax1.plot(self.error_history, 'r-', alpha=0.7)
@@ -142,12 +219,18 @@ class Perceptron() :
         ax2.grid(True, alpha=0.3)
         ax2.tick_params(axis='both', which='major', labelsize=10)
         
+        if axes is not None:
+            fig.canvas.draw_idle()
+            return ax1, ax2
+        
         plt.tight_layout()
         plt.show()
         
         # Si es un problema 2D, mostrar la frontera de decisión
         if self.w.shape[0] == 2 and self.training_data is not None:
             self.plot_decision_boundary()
+        
+        return ax1, ax2
 
     def plot_decision_boundary(self):
 
@@ -162,15 +245,16 @@ class Perceptron() :
         # Crear una malla para visualizar la frontera de decisión
         x_min, x_max = -1.5, 1.5
         y_min, y_max = -1.5, 1.5
-        xx, yy = np.meshgrid(np.arange(x_min, x_max, 0.01),
-                             np.arange(y_min, y_max, 0.01))
+        xs = np.arange(x_min, x_max, 0.01, dtype=np.float32)
+        ys = np.arange(y_min, y_max, 0.01, dtype=np.float32)
         
-        # Predecir para cada punto de la malla
-        Z = self.predict(np.c_[xx.ravel(), yy.ravel()])
-        Z = Z.reshape(xx.shape)
+        # Predecir para cada punto de la malla por broadcasting (filas: y, columnas: x),
+        # sin materializar la malla ni la matriz de coordenadas apiladas
+        w0, w1 = self.w.ravel()
+        Z = np.where(xs[np.newaxis, :] * w0 + ys[:, np.newaxis] * w1 + self.b >= 0, np.int8(1), np.int8(-1))
         
         # Graficar contorno
-        plt.contourf(xx, yy, Z, alpha=0.3, cmap=plt.cm.coolwarm)
+        plt.contourf(xs, ys, Z, alpha=0.3, cmap=plt.cm.coolwarm)
         plt.colorbar()
         
         # Graficar puntos de datos
@@ -15,10 +15,6 @@ class ProjectConfig:
     DATA_PROCESSED = BASE_DIR / "data" / "processed"
     LOGS_DIR = BASE_DIR / "logs"
 
-    # Crear directorios si no existen
-    for directory in [DATA_RAW, DATA_PROCESSED, LOGS_DIR]:
-        directory.mkdir(parents = True, exist_ok = True)
-
     # Bounding box para Río Negro, Patagonia (ejemplo)
     BBOX = [-71.8756,-41.5862,-71.3782,-41.3608]  # [Oeste, Sur, Este, Norte]
 
@@ -53,4 +49,10 @@ class ProjectConfig:
         'latitude', 'longitude', 'brightness', 'scan', 'track',
         'acq_date', 'acq_time', 'satellite', 'instrument', 'confidence',
         'version', 'bright_t31', 'frp', 'daynight'
-    ]
\ No newline at end of file
+    ]
+
+    @classmethod
+    def ensure_dirs(cls):
+        """Crea los directorios de datos y logs si no existen (una vez, al iniciar)"""
+        for directory in [cls.DATA_RAW, cls.DATA_PROCESSED, cls.LOGS_DIR]:
+            directory.mkdir(parents = True, exist_ok = True)
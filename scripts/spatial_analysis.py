@@ -1,37 +1,58 @@
 import geopandas as gpd
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 import numpy as np
-from shapely.geometry import Point
+from shapely.geometry import MultiPoint
 import contextily as ctx
 from project_config import ProjectConfig
+from feature_engineering import create_spatial_clusters
 import logging
 # import scikit-learn modules as needed
 
 logger = logging.getLogger(__name__)
 
+# Resolución de la grilla donde se evalúa la densidad de detecciones
+# (sólo se usa cuando hay más de KDE_GRID_SIZE² puntos)
+KDE_GRID_SIZE = 50
+
+def _nearest_cell(values, grid):
+    """Índice de la celda más cercana de una grilla equiespaciada (0 si la grilla no tiene extensión)"""
+    span = grid[-1] - grid[0]
+    if span == 0:
+        return np.zeros(len(values), dtype=int)
+    return np.rint((values - grid[0]) / span * (len(grid) - 1)).astype(int)
+
 class SpatialAnalysis :
 
     def __init__(self, fire_data) :
         self.fire_data = fire_data
-        self.gdf = None
-        
-    def create_geodataframe(self) :
+        self._gdf = None
+    
+    @property
+    def gdf(self) :
+        """GeoDataFrame de las detecciones, construido una sola vez al primer acceso"""
+        if self._gdf is None:
+            self._gdf = self._build_gdf()
+        return self._gdf
+        
+    def _build_gdf(self) :
         """Convierte los datos a GeoDataFrame"""
         try:
-            geometry = [Point(xy) for xy in zip(self.fire_data.longitude, self.fire_data.latitude)]
-            self.gdf = gpd.GeoDataFrame(self.fire_data, geometry=geometry, crs="EPSG:4326")
-            logger.info(f"GeoDataFrame creado con {len(self.gdf)} registros")
-            return self.gdf
+            geometry = gpd.points_from_xy(self.fire_data.longitude, self.fire_data.latitude)
+            gdf = gpd.GeoDataFrame(self.fire_data, geometry=geometry, crs="EPSG:4326")
+            logger.info(f"GeoDataFrame creado con {len(gdf)} registros")
+            return gdf
         except Exception as e:
             logger.error(f"Error creando GeoDataFrame: {e}")
             return None
     
+    def create_geodataframe(self) :
+        """Convierte los datos a GeoDataFrame"""
+        return self.gdf
+    
     def calculate_basic_stats(self) :
         """Calcula estadísticas espaciales básicas"""
-        if self.gdf is None:
-            self.create_geodataframe()
-        
         stats = {
             'total_detections': len(self.gdf),
             'area_covered_km2': self.calculate_area_covered(),
@@ -48,23 +69,24 @@ class SpatialAnalysis :
         if len(self.gdf) <= 1:
             return 0
         
-        # Crear un convex hull y calcular área
-        convex_hull = self.gdf.unary_union.convex_hull
-        # Convertir a CRS métrico para calcular área en km²
-        gdf_metric = self.gdf.to_crs(epsg=5348)  # CRS para Argentina
-        area_km2 = gdf_metric.unary_union.convex_hull.area / 1e6
+        # Convertir sólo las geometrías a CRS métrico para calcular área en km²
+        geometry_metric = self.gdf.geometry.to_crs(epsg=5348)  # CRS para Argentina
+        # Convex hull directo de las coordenadas, sin construir la unión de geometrías
+        convex_hull = MultiPoint(geometry_metric.get_coordinates().to_numpy()).convex_hull
+        area_km2 = convex_hull.area / 1e6
         
         return round(area_km2, 2)
     
     def plot_spatial_distribution(self, save_path = None) :
         """Crea visualización de la distribución espacial"""
-        if self.gdf is None:
-            self.create_geodataframe()
-        
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
         
+        # Coordenadas una sola vez (las geometrías se crean a partir de estas columnas)
+        x = self.gdf['longitude'].to_numpy()
+        y = self.gdf['latitude'].to_numpy()
+        
         # Mapa 1: Distribución por FRP
-        scatter1 = ax1.scatter(self.gdf.geometry.x, self.gdf.geometry.y, 
+        scatter1 = ax1.scatter(x, y, 
                               c=self.gdf['frp'], cmap='YlOrRd', s=50, alpha=0.7)
         ax1.set_title('Distribución por Potencia Radiante (FRP)')
         ax1.set_xlabel('Longitud')
@@ -72,7 +94,7 @@ class SpatialAnalysis :
         plt.colorbar(scatter1, ax=ax1, label='FRP (MW)')
         
         # Mapa 2: Distribución por confianza
-        scatter2 = ax2.scatter(self.gdf.geometry.x, self.gdf.geometry.y, 
+        scatter2 = ax2.scatter(x, y, 
                               c=self.gdf['confidence'], cmap='viridis', s=50, alpha=0.7)
         ax2.set_title('Distribución por Nivel de Confianza')
         ax2.set_xlabel('Longitud')
@@ -81,20 +103,33 @@ class SpatialAnalysis :
         
         # Mapa 3: Distribución día/noche
         day_night_colors = {'D': 'red', 'N': 'blue'}
-        for dn, color in day_night_colors.items():
-            mask = self.gdf['daynight'] == dn
-            ax3.scatter(self.gdf.geometry.x[mask], self.gdf.geometry.y[mask], 
-                       c=color, label=dn, s=40, alpha=0.6)
+        # Un único scatter coloreado por código categórico (valores fuera de D/N quedan en -1)
+        codes = pd.Categorical(self.gdf['daynight'], categories=list(day_night_colors)).codes
+        known = codes >= 0
+        colors = np.array(list(day_night_colors.values()))[codes[known]]
+        ax3.scatter(x[known], y[known], c=colors, s=40, alpha=0.6)
         ax3.set_title('Distribución Día/Noche')
         ax3.set_xlabel('Longitud')
         ax3.set_ylabel('Latitud')
-        ax3.legend()
+        ax3.legend(handles=[
+            Line2D([], [], marker='o', linestyle='', color=color, alpha=0.6, label=dn)
+            for dn, color in day_night_colors.items()
+        ])
         
         # Mapa 4: Densidad de puntos
         from scipy.stats import gaussian_kde
-        x, y = self.gdf.geometry.x, self.gdf.geometry.y
         xy = np.vstack([x, y])
-        z = gaussian_kde(xy)(xy)
+        kde = gaussian_kde(xy)
+        if len(x) <= KDE_GRID_SIZE ** 2:
+            # Con pocos puntos la evaluación exacta (O(N²)) es más barata que la grilla (O(N·G²))
+            z = kde(xy)
+        else:
+            # Evaluar la KDE en una grilla fija y asignar a cada punto la celda más cercana
+            gx = np.linspace(x.min(), x.max(), KDE_GRID_SIZE)
+            gy = np.linspace(y.min(), y.max(), KDE_GRID_SIZE)
+            GX, GY = np.meshgrid(gx, gy)
+            density = kde(np.vstack([GX.ravel(), GY.ravel()])).reshape(KDE_GRID_SIZE, KDE_GRID_SIZE)
+            z = density[_nearest_cell(y, gy), _nearest_cell(x, gx)]
         scatter4 = ax4.scatter(x, y, c=z, cmap='plasma', s=40, alpha=0.7)
         ax4.set_title('Densidad de Detecciones')
         ax4.set_xlabel('Longitud')
@@ -118,43 +153,39 @@ class SpatialAnalysis :
         m = folium.Map(location=[center_lat, center_lon], zoom_start=9)
         
         # Añadir heatmap
-        heat_data = [[row['latitude'], row['longitude'], row['frp']] 
-                    for _, row in self.gdf.iterrows()]
+        heat_data = self.gdf[['latitude', 'longitude', 'frp']].to_numpy(dtype=float).tolist()
         HeatMap(heat_data, radius=15, blur=10, max_zoom=1).add_to(m)
         
         # Añadir marcadores para los puntos más intensos
+        # (un único GeoJSON en lugar de un CircleMarker por fila)
         top_fires = self.gdf.nlargest(10, 'frp')
-        for _, fire in top_fires.iterrows():
-            folium.CircleMarker(
-                location=[fire['latitude'], fire['longitude']],
-                radius=fire['frp'] / 50,  # Tamaño proporcional al FRP
-                popup=f"FRP: {fire['frp']} MW<br>Fecha: {fire['acq_date']}",
-                color='red',
-                fill=True
-            ).add_to(m)
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [float(lon), float(lat)]},
+                'properties': {'frp': float(frp), 'date': str(date)}
+            }
+            for lon, lat, frp, date in top_fires[['longitude', 'latitude', 'frp', 'acq_date']].itertuples(index=False)
+        ]
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            marker=folium.CircleMarker(),
+            style_function=lambda feature: {
+                'radius': feature['properties']['frp'] / 50,  # Tamaño proporcional al FRP
+                'color': 'red',
+                'fill': True
+            },
+            popup=folium.GeoJsonPopup(fields=['frp', 'date'], aliases=['FRP (MW)', 'Fecha'])
+        ).add_to(m)
         
         if save_path:
             m.save(save_path)
         
         return m
     
-    def cluster_analysis(self) :
-        """Análisis de clusters espaciales"""
-        from sklearn.cluster import DBSCAN
-        from sklearn.preprocessing import StandardScaler
-        
-        # Coordenadas para clustering
-        coords = self.gdf[['latitude', 'longitude']].values
-        
-        # Estandarizar
-        scaler = StandardScaler()
-        coords_scaled = scaler.fit_transform(coords)
-        
-        # DBSCAN clustering
-        dbscan = DBSCAN(eps=0.3, min_samples=3)
-        clusters = dbscan.fit_predict(coords_scaled)
-        
-        self.gdf['cluster'] = clusters
+    def cluster_analysis(self, eps_km = 1.5) :
+        """Análisis de clusters espaciales (DBSCAN haversine, eps en km)"""
+        self.gdf['cluster'] = create_spatial_clusters(self.gdf, eps_km=eps_km, min_samples=3)
         
         # Estadísticas por cluster
         cluster_stats = self.gdf.groupby('cluster').agg({
@@ -168,9 +199,6 @@ class SpatialAnalysis :
     
     def export_results(self, output_path) :
         """Exporta resultados del análisis"""
-        if self.gdf is None:
-            self.create_geodataframe()
-        
         # Guardar GeoJSON
         geojson_path = f"{output_path}/fire_locations.geojson"
         self.gdf.to_file(geojson_path, driver='GeoJSON')
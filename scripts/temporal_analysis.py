@@ -5,9 +5,12 @@ import seaborn as sns
 def analyze_temporal_patterns(fire_data):
     """Analiza patrones temporales de los incendios"""
     # Convertir a datetime
-    fire_data['acq_datetime'] = pd.to_datetime(
-        fire_data['acq_date'] + ' ' + fire_data['acq_time'].astype(str).str.zfill(4),
-        format='%Y-%m-%d %H%M'
+    # acq_time viene como HHMM entero: se suma como timedelta sin pasar por strings
+    acq_time = fire_data['acq_time'].astype('int32')
+    fire_data['acq_datetime'] = (
+        pd.to_datetime(fire_data['acq_date'], format='%Y-%m-%d')
+        + pd.to_timedelta(acq_time // 100, unit='h')
+        + pd.to_timedelta(acq_time % 100, unit='m')
     )
     
     # Extraer características temporales
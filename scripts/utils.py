@@ -2,24 +2,60 @@ import os
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import matplotlib.pyplot as plt
 import logging
 
 from datetime import datetime, timedelta
-from shapely.geometry import Point
+from concurrent.futures import ThreadPoolExecutor
+from project_config import ProjectConfig as cfg
 
 logger = logging.getLogger(__name__)
 
-def dataframe_to_csv(df, path):
-    """Guarda un DataFrame en CSV. Chequea existencia de carpeta."""
+# Buffer de escritura grande para CSV: menos syscalls write(2) en archivos de varios MB
+WRITE_BUFFER_SIZE = 4 << 20
+
+def _write_csv(df, path):
+    """Escribe CSV con el writer nativo de pyarrow; pandas queda como respaldo para tipos no soportados"""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # El writer CSV no acepta columnas diccionario (categóricas): se decodifican a sus valores
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+        with pa.output_stream(path, buffer_size=WRITE_BUFFER_SIZE) as sink:
+            pa_csv.write_csv(table, sink, write_options=pa_csv.WriteOptions(include_header=True))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        with open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            df.to_csv(f, index=False, encoding='utf-8')
+
+def save_dataframe(df, path, format='parquet'):
+    """Guarda un DataFrame en Parquet (zstd, por defecto) o CSV. Chequea existencia de carpeta."""
     try:
         folder = os.path.dirname(path)
         if folder and not os.path.exists(folder):
             os.makedirs(folder, exist_ok=True)
-        df.to_csv(path, index=False)
+        if format == 'parquet':
+            path = os.path.splitext(path)[0] + '.parquet'
+            df.to_parquet(path, engine='pyarrow', compression='zstd', compression_level=3, index=False)
+        else:
+            _write_csv(df, path)
         logger.info(f"DataFrame guardado en {path}")
+        return path
     except Exception as e:
-        logger.error(f"Error guardando DataFrame en CSV: {e}")
+        logger.error(f"Error guardando DataFrame en {format}: {e}")
+        return None
+
+def save_many(frames, format='parquet', max_workers=8):
+    """Guarda varios DataFrames en paralelo. frames: lista de (df, path). Devuelve las rutas escritas."""
+    # pyarrow libera el GIL al serializar y escribir: los archivos chicos se solapan en hilos
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda item: save_dataframe(*item, format=format), frames))
+
+def dataframe_to_csv(df, path):
+    """Guarda un DataFrame en CSV. Chequea existencia de carpeta."""
+    return save_dataframe(df, path, format='csv')
 
 def linear_sep_data(n = 100, p = 2):
     x = np.random.uniform(0, 1, (n, p))
@@ -31,7 +67,7 @@ def create_geodataframe_from_csv(csv_path, lat_col='latitude', lon_col='longitud
     """Convierte un CSV con coordenadas a GeoDataFrame"""
     try:
         df = pd.read_csv(csv_path)
-        geometry = [Point(xy) for xy in zip(df[lon_col], df[lat_col])]
+        geometry = gpd.points_from_xy(df[lon_col], df[lat_col])
         gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
         logger.info(f"GeoDataFrame creado desde {csv_path} con {len(gdf)} registros")
         return gdf
@@ -41,9 +77,7 @@ def create_geodataframe_from_csv(csv_path, lat_col='latitude', lon_col='longitud
 
 def save_plot(fig, filename, subfolder=""):
     """Guarda gráficos en la carpeta docs"""
-    from scripts.config import BASE_DIR
-
-    plot_path = BASE_DIR / "docs" / subfolder / filename
+    plot_path = cfg.BASE_DIR / "docs" / subfolder / filename
     plot_path.parent.mkdir(exist_ok=True)
     fig.savefig(plot_path, dpi=300, bbox_inches='tight')
     plt.close(fig)
@@ -56,7 +90,8 @@ def save_plot(fig, filename, subfolder=""):
 def calculate_fire_progression(fires_gdf, date_col='acq_date'):
     """Calcula la progresión temporal del incendio"""
     try:
-        fires_gdf[date_col] = pd.to_datetime(fires_gdf[date_col])
+        # FIRMS entrega acq_date como YYYY-MM-DD: formato explícito (parser rápido) y caché de fechas repetidas
+        fires_gdf[date_col] = pd.to_datetime(fires_gdf[date_col], format='%Y-%m-%d', cache=True)
         daily_progression = fires_gdf.groupby(date_col).agg({
             'frp': ['sum', 'mean', 'count'],  # Radiative power
             'confidence': 'mean'